@@ -0,0 +1,61 @@
+"""
+Боевой ASGI-сервер careercenter (uvicorn).
+
+Запуск: ``python -m careercenter.asgi_server``; настройки берутся из окружения
+(или из .env через python-decouple):
+
+    ASGI_BIND             host:port для прослушивания (по умолчанию 0.0.0.0:8000)
+    WEB_CONCURRENCY       число процессов-воркеров (по умолчанию 2)
+    ASGI_LIMIT_CONCURRENCY  предел одновременных соединений воркера, дальше 503
+    ASGI_BACKLOG          очередь слушающего сокета
+    ASGI_KEEPALIVE        тайм-аут keep-alive, секунды
+    FORWARDED_ALLOW_IPS   прокси, чьим заголовкам X-Forwarded-* доверяем
+
+Каждый воркер обслуживает много медленных клиентов в одном цикле событий:
+страницы вакансий только для чтения и попадания в кэш API работают как
+асинхронные представления (ASYNC_VIEWS включается в careercenter/asgi.py),
+остальной Django — в пуле потоков. То же приложение можно запустить под
+управлением gunicorn с GUNICORN_WORKER_CLASS=uvicorn
+(см. careercenter/gunicorn_conf.py).
+"""
+
+import os
+
+import uvicorn
+from decouple import config
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """Воркер gunicorn для GUNICORN_WORKER_CLASS=uvicorn (см. gunicorn_conf)."""
+
+    # Django не поддерживает протокол lifespan.
+    CONFIG_KWARGS = {**BaseUvicornWorker.CONFIG_KWARGS, "lifespan": "off"}
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "careercenter.settings")
+    from main import metrics
+
+    # Снимки метрик прошлого запуска не должны попасть в суммы /metrics.
+    metrics.clear_directory()
+
+    host, _, port = config("ASGI_BIND", default="0.0.0.0:8000").rpartition(":")
+    uvicorn.run(
+        "careercenter.asgi:application",
+        host=host,
+        port=int(port),
+        workers=config("WEB_CONCURRENCY", default=2, cast=int),
+        limit_concurrency=config("ASGI_LIMIT_CONCURRENCY", default=1000, cast=int),
+        backlog=config("ASGI_BACKLOG", default=2048, cast=int),
+        timeout_keep_alive=config("ASGI_KEEPALIVE", default=5, cast=int),
+        proxy_headers=True,
+        forwarded_allow_ips=config("FORWARDED_ALLOW_IPS", default="127.0.0.1"),
+        # Django не поддерживает протокол lifespan.
+        lifespan="off",
+        log_level=config("LOG_LEVEL", default="info").lower(),
+    )
+
+
+if __name__ == "__main__":
+    main()
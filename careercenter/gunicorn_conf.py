@@ -0,0 +1,225 @@
+"""
+Конфигурация gunicorn для careercenter.
+
+Запуск:
+
+    gunicorn -c python:careercenter.gunicorn_conf
+
+Любую настройку можно переопределить переменной окружения (или в .env):
+
+    GUNICORN_BIND            host:port (по умолчанию 0.0.0.0:8000)
+    GUNICORN_WORKER_CLASS    sync, gthread (по умолчанию) или uvicorn
+    WEB_CONCURRENCY          число процессов-воркеров (по умолчанию зависит
+                             от класса)
+    GUNICORN_THREADS         потоков в воркере gthread (по умолчанию 4)
+    GUNICORN_MAX_REQUESTS    перезапуск воркера после стольких запросов
+                             (0 — никогда)
+    GUNICORN_MAX_REQUESTS_JITTER  случайная добавка к порогу, чтобы воркеры
+                             не перезапускались одновременно
+    GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE
+    GUNICORN_PRELOAD         загрузка приложения в мастере до fork
+                             (по умолчанию включена)
+    GUNICORN_LOG_LEVEL, GUNICORN_ACCESS_LOG
+
+С preload мастер один раз импортирует Django, URLconf и шаблоны и замораживает
+их (gc.freeze), так что воркеры делят эту память copy-on-write. Соединения с БД
+в мастере не открываются: каждый воркер открывает свои и прогревает
+справочники и кэш в post_worker_init, до первого запроса. Статистика воркеров
+(запросы, RSS, порог перезапуска, завершения) отдаётся на /metrics
+(см. main.metrics). При нескольких воркерах кэш должен быть общим
+(CACHE_BACKEND=file или redis), иначе при старте выводится предупреждение.
+
+Сравнение классов воркеров на одном наборе данных:
+
+    DATABASE_NAME=/tmp/benchmark.sqlite3 python manage.py benchmark \\
+        --http --worker-class sync --worker-class gthread --worker-class uvicorn \\
+        --concurrency 32 --slow-clients 2
+
+Каждый класс выводится отдельным режимом (http, http-gthread, http-uvicorn)
+с перцентилями задержки, пропускной способностью и пиковой памятью всего
+сервера.
+"""
+
+import gc
+import os
+import resource
+import time
+
+# Модуль импортируется целиком, а не «from decouple import config»: имя
+# config у модуля конфигурации gunicorn считал бы своей настройкой.
+import decouple
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "careercenter.settings")
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "careercenter.asgi_server.UvicornWorker",
+}
+CPU_COUNT = os.cpu_count() or 1
+
+
+def default_workers(worker_class):
+    # Синхронный воркер простаивает на вводе-выводе, поэтому их больше ядер;
+    # gthread и uvicorn параллелят ожидание внутри процесса.
+    if worker_class == "sync":
+        return CPU_COUNT * 2 + 1
+    return CPU_COUNT + 1 if worker_class == "gthread" else CPU_COUNT
+
+
+worker_class_name = decouple.config("GUNICORN_WORKER_CLASS", default="gthread")
+worker_class = WORKER_CLASSES.get(worker_class_name, worker_class_name)
+wsgi_app = (
+    "careercenter.asgi:application"
+    if worker_class_name == "uvicorn"
+    else "careercenter.wsgi:application"
+)
+
+bind = decouple.config("GUNICORN_BIND", default="0.0.0.0:8000")
+workers = decouple.config(
+    "WEB_CONCURRENCY", default=default_workers(worker_class_name), cast=int
+)
+threads = decouple.config(
+    "GUNICORN_THREADS",
+    default=4 if worker_class_name == "gthread" else 1,
+    cast=int,
+)
+
+max_requests = decouple.config("GUNICORN_MAX_REQUESTS", default=1000, cast=int)
+max_requests_jitter = decouple.config(
+    "GUNICORN_MAX_REQUESTS_JITTER", default=max_requests // 10, cast=int
+)
+timeout = decouple.config("GUNICORN_TIMEOUT", default=30, cast=int)
+graceful_timeout = decouple.config("GUNICORN_GRACEFUL_TIMEOUT", default=30, cast=int)
+keepalive = decouple.config("GUNICORN_KEEPALIVE", default=5, cast=int)
+
+preload_app = decouple.config("GUNICORN_PRELOAD", default=True, cast=bool)
+# Heartbeat-файлы воркеров в памяти, а не на диске контейнера.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+loglevel = decouple.config("GUNICORN_LOG_LEVEL", default="info")
+accesslog = decouple.config("GUNICORN_ACCESS_LOG", default=None)
+
+WARM_TEMPLATES = (
+    "layout.html",
+    "vacancies.html",
+    "vacancy.html",
+    "companies.html",
+    "includes/vacancy_card.html",
+    "includes/company_tile.html",
+)
+
+
+def on_starting(server):
+    from main import metrics
+
+    # Снимки метрик прошлого запуска не должны попасть в суммы /metrics.
+    metrics.clear_directory()
+    check_shared_cache(server)
+
+
+def check_shared_cache(server):
+    from django.conf import settings
+
+    if server.cfg.workers < 2:
+        return
+    # Версии кэша (main.caching) сбрасываются в воркере, обработавшем запись;
+    # с locmem остальные воркеры до истечения срока отдают старые страницы.
+    local = [
+        alias
+        for alias, options in settings.CACHES.items()
+        if options["BACKEND"].endswith(".LocMemCache")
+    ]
+    if local:
+        server.log.warning(
+            "Кэш %s (locmem) у каждого из %d воркеров свой: сброс кэша после "
+            "изменений не дойдёт до остальных воркеров. Задайте CACHE_BACKEND="
+            "file или redis.",
+            ", ".join(local),
+            server.cfg.workers,
+        )
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import reverse
+
+    # Всё, что загружено в мастере до fork, воркеры делят copy-on-write:
+    # reverse() импортирует URLconf со всеми представлениями и сериализаторами.
+    reverse("vacancies")
+    for name in WARM_TEMPLATES:
+        get_template(name)
+    # Соединение, открытое до fork, оказалось бы общим для всех воркеров;
+    # пул psycopg к тому же держит свои потоки, которые fork не переживают.
+    for connection in connections.all():
+        connection.close()
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+    # Объекты мастера не трогает сборщик мусора воркеров, и страницы памяти
+    # не копируются из-за счётчиков поколений.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from main import metrics
+
+    metrics.reset()
+
+
+def post_worker_init(worker):
+    from django.core.cache import caches
+    from django.db import connections
+
+    from main import caching, lookups, metrics
+
+    # До первого запроса: проверить, что БД и кэш доступны, и заполнить
+    # справочники процесса. Соединения открываются в основном потоке — их
+    # использует sync-воркер; потоки gthread и uvicorn открывают свои.
+    for connection in connections.all():
+        connection.ensure_connection()
+        # Из пула соединение берётся на время запроса, а не на жизнь потока.
+        if getattr(connection, "pool", None):
+            connection.close()
+    for cache in caches.all(initialized_only=False):
+        cache.get("warmup")
+    caching.get_version(caching.VACANCIES)
+    lookups.fields_of_study.all()
+
+    started = time.time()
+    pid = os.getpid()
+
+    def collect_worker_stats():
+        metrics.WORKER_REQUESTS.set(metrics.local_total(metrics.REQUESTS), pid=pid)
+        metrics.WORKER_MAX_REQUESTS.set(worker.max_requests, pid=pid)
+        metrics.WORKER_RSS.set(rss_bytes(), pid=pid)
+        metrics.WORKER_STARTED.set(started, pid=pid)
+
+    metrics.register_collector(collect_worker_stats)
+    metrics.flush(force=True)
+
+
+def worker_abort(worker):
+    from main import metrics
+
+    # SIGABRT от мастера: воркер не уложился в timeout.
+    metrics.WORKER_EXITS.inc(reason="timeout")
+    metrics.flush(force=True)
+
+
+def child_exit(server, worker):
+    from main import metrics
+
+    metrics.WORKER_EXITS.inc(reason="exit")
+    metrics.mark_process_dead(worker.pid)
+    metrics.flush(force=True)
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
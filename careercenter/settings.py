@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,7 +55,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "main.metrics.MetricsMiddleware",
+    "main.profiling.ProfilingMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
+    "main.history.HistoryBatchMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -69,8 +72,11 @@ ROOT_URLCONF = "careercenter.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "main.profiling.ProfiledDjangoTemplates",
         "DIRS": [],
+        # Без явного "loaders" Django оборачивает загрузчики в cached.Loader:
+        # шаблон компилируется один раз на процесс (в DEBUG сбрасывается
+        # автоперезагрузкой при правке файлов).
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -85,16 +91,156 @@ TEMPLATES = [
 WSGI_APPLICATION = "careercenter.wsgi.application"
 
 DEBUG = config('DEBUG', default=False, cast=bool)
+ALLOWED_HOSTS = config("ALLOWED_HOSTS", default="", cast=Csv())
 SECRET_KEY = config('SECRET_KEY', default='your-fallback-secret-key')
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+DATABASE_ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+}
+DATABASE_DEFAULT_NAMES = {
+    "sqlite": os.path.join(BASE_DIR, "db.sqlite3"),
+    "postgresql": "careercenter",
+}
+
+# sqlite — для разработки; в продакшене postgresql (нужен пакет psycopg,
+# локальная база: docker compose --profile postgres up).
+DATABASE_ENGINE = config("DATABASE_ENGINE", default="sqlite")
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    "default": {
+        "ENGINE": DATABASE_ENGINES[DATABASE_ENGINE],
+        "NAME": config(
+            "DATABASE_NAME", default=DATABASE_DEFAULT_NAMES[DATABASE_ENGINE]
+        ),
+    }
+}
+if DATABASE_ENGINE == "postgresql":
+    DATABASES["default"].update(
+        {
+            "USER": config("DATABASE_USER", default="careercenter"),
+            "PASSWORD": config("DATABASE_PASSWORD", default=""),
+            "HOST": config("DATABASE_HOST", default="127.0.0.1"),
+            "PORT": config("DATABASE_PORT", default="5432"),
+            # Перед повторным использованием соединение проверяется, и
+            # оборванное после рестарта базы переоткрывается без ошибки 500.
+            "CONN_HEALTH_CHECKS": True,
+            # Выгрузки читают вакансии через .iterator() серверным курсором.
+            # За pgbouncer в режиме transaction курсоры нужно отключить.
+            "DISABLE_SERVER_SIDE_CURSORS": config(
+                "DATABASE_DISABLE_SERVER_SIDE_CURSORS", default=False, cast=bool
+            ),
+            "OPTIONS": {
+                "connect_timeout": config(
+                    "DATABASE_CONNECT_TIMEOUT", default=5, cast=int
+                ),
+            },
+        }
+    )
+    # Пул psycopg живёт в каждом процессе отдельно: max_size — не больше
+    # потоков воркера (GUNICORN_THREADS), иначе соединения простаивают, а
+    # воркеры × max_size не должно превышать max_connections сервера.
+    if config("DATABASE_POOL", default=True, cast=bool):
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": config("DATABASE_POOL_MIN_SIZE", default=1, cast=int),
+            "max_size": config("DATABASE_POOL_MAX_SIZE", default=4, cast=int),
+            "timeout": config("DATABASE_POOL_TIMEOUT", default=10, cast=int),
+        }
+    else:
+        # Без пула соединение живёт между запросами потока CONN_MAX_AGE секунд.
+        DATABASES["default"]["CONN_MAX_AGE"] = config(
+            "DATABASE_CONN_MAX_AGE", default=60, cast=int
+        )
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_DEFAULT_LOCATIONS = {
+    "locmem": "careercenter",
+    "file": os.path.join(BASE_DIR, ".cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+}
+
+# locmem живёт внутри одного процесса: при нескольких воркерах gunicorn
+# сброс кэша по сигналам доходит только до «своего» воркера, поэтому
+# в продакшене нужен file или redis (нужен пакет redis); docker-compose.yml
+# задаёт file, а gunicorn_conf предупреждает о locmem при нескольких воркерах.
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": config(
+            "CACHE_LOCATION", default=CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]
+        ),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
     }
 }
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+FACETS_CACHE_TIMEOUT = config("FACETS_CACHE_TIMEOUT", default=600, cast=int)
+# Карточки вакансий и плитки компаний (main.fragments): ключ меняется вместе
+# с updated_at, так что срок нужен только чтобы вытеснять старые версии.
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIMEOUT = config("FRAGMENT_CACHE_TIMEOUT", default=86400, cast=int)
+
+# count в списках API (main.pagination.KeysetCursorPagination): exact,
+# estimated, cached или none; клиент выбирает своё значение через ?count=.
+API_COUNT_MODE = config("API_COUNT_MODE", default="cached")
+API_COUNT_CACHE_TIMEOUT = config("API_COUNT_CACHE_TIMEOUT", default=600, cast=int)
+# Чтение списков и объектов API через .values() вместо ModelSerializer
+# (main.readserializers); False — обычные сериализаторы DRF.
+API_FAST_READ = config("API_FAST_READ", default=True, cast=bool)
+
+# Запись истории изменений (simple_history): immediate — сразу при save(),
+# batched — одним INSERT в конце запроса, deferred — после отправки ответа.
+# Буферизация включается явно в окружении развёртывания. См. main.history.
+HISTORY_RECORDING = config("HISTORY_RECORDING", default="immediate")
+
+# Async-версии чтения вакансий (HTML и кэш ответов API). Включается в
+# careercenter/asgi.py; под WSGI каждый async-вызов шёл бы через отдельный
+# цикл событий, поэтому по умолчанию выключено.
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Профилирование запросов (main.profiling): доля профилируемых запросов
+# (0 — middleware выключено), порог медленного запроса и каталог его дампов.
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0.0, cast=float)
+PROFILING_SLOW_MS = config("PROFILING_SLOW_MS", default=500, cast=int)
+PROFILING_DUMP_DIR = config(
+    "PROFILING_DUMP_DIR", default=os.path.join(BASE_DIR, ".profiles")
+)
+PROFILING_MAX_DUMPS = 200
+
+# Метрики для Prometheus (main.metrics, GET /metrics): каждый процесс пишет
+# снимок в METRICS_DIR, эндпоинт их суммирует. Пустой METRICS_TOKEN —
+# эндпоинт открыт, иначе нужен заголовок «Authorization: Bearer <токен>».
+METRICS_DIR = config("METRICS_DIR", default=os.path.join(BASE_DIR, ".metrics"))
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", default=5, cast=float)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "main": {
+            "handlers": ["console"],
+            "level": config("LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
+# Хранение истории: manage.py history_retention сжимает записи старше
+# compact_after_days и переносит в archive_dir записи старше archive_after_days.
+HISTORY_RETENTION = {
+    "compact_after_days": config("HISTORY_COMPACT_AFTER_DAYS", default=30, cast=int),
+    "archive_after_days": config("HISTORY_ARCHIVE_AFTER_DAYS", default=365, cast=int),
+    "archive_dir": config(
+        "HISTORY_ARCHIVE_DIR", default=os.path.join(BASE_DIR, "history_archive")
+    ),
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,6 +273,9 @@ USE_TZ = True
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Уменьшенные копии логотипов и обложек (main.images) строятся в фоновом
+# потоке после сохранения; False — сразу, в том же запросе.
+IMAGE_VARIANTS_ASYNC = config("IMAGE_VARIANTS_ASYNC", default=True, cast=bool)
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
@@ -139,4 +288,8 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "main.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
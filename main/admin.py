@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.db.models import Count
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
-from . import models
+from . import images, jobs, models
 
 
 class VacancyInline(admin.TabularInline):
@@ -20,16 +22,35 @@ class CompanyAdmin(admin.ModelAdmin):
     search_fields = ["name", "industry"]
     inlines = [VacancyInline]
     readonly_fields = ["logo_preview"]
+    actions = ["export_vacancies"]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return queryset.annotate(vacancy_total=Count("vacancies"))
 
     @admin.display(description="Логотип")
     def logo_preview(self, obj):
-        if obj.logo:
-            return mark_safe(f'<img src="{obj.logo.url}" style="max-height: 40px;">')
-        return "—"
+        if not obj.logo:
+            return "—"
+        # Уменьшенная копия, пока её нет — исходник.
+        url = images.variant_url(obj.logo, obj.logo_variants, "sm", "webp")
+        return format_html(
+            '<img src="{}" style="max-height: 40px;">', url or obj.logo.url
+        )
 
-    @admin.display(description="Вакансий")
+    @admin.display(description="Вакансий", ordering="vacancy_total")
     def vacancy_count(self, obj):
-        return obj.vacancies.count()
+        return obj.vacancy_total
+
+    @admin.action(description="Выгрузить вакансии в фоне (XLSX)")
+    def export_vacancies(self, request, queryset):
+        for company in queryset:
+            jobs.enqueue_export(company=company, user=request.user)
+        self.message_user(
+            request,
+            f"Поставлено в очередь выгрузок: {queryset.count()}. "
+            "Готовые файлы — в разделе «Задачи выгрузки».",
+        )
 
 
 @admin.register(models.FieldOfStudy)
@@ -49,6 +70,7 @@ class UserInline(admin.TabularInline):
 class UserAdmin(admin.ModelAdmin):
     list_display = ["full_name", "email", "role", "company_link"]
     list_filter = ["role", "company"]
+    list_select_related = ["company"]
     search_fields = ["full_name", "email"]
     readonly_fields = ["last_login", "date_joined"]
     raw_id_fields = ["company"]
@@ -60,9 +82,9 @@ class UserAdmin(admin.ModelAdmin):
 
     @admin.display(description="Компания")
     def company_link(self, obj):
-        if obj.company:
+        if obj.company_id:
             return mark_safe(
-                f'<a href="/admin/main/company/{obj.company.id}/change/">{obj.company.name}</a>'
+                f'<a href="/admin/main/company/{obj.company_id}/change/">{obj.company.name}</a>'
             )
         return "—"
 
@@ -86,6 +108,7 @@ class VacancyAdmin(admin.ModelAdmin):
         "created_at",
         "company__industry",
     ]
+    list_select_related = ["company"]
     search_fields = ["title", "description", "company__name", "city"]
     date_hierarchy = "created_at"
     raw_id_fields = ["company", "field"]
@@ -111,7 +134,7 @@ class VacancyAdmin(admin.ModelAdmin):
     @admin.display(description="Компания")
     def company_link(self, obj):
         return mark_safe(
-            f'<a href="/admin/main/company/{obj.company.id}/change/">{obj.company.name}</a>'
+            f'<a href="/admin/main/company/{obj.company_id}/change/">{obj.company.name}</a>'
         )
 
     @admin.display(description="Зарплата")
@@ -123,3 +146,29 @@ class VacancyAdmin(admin.ModelAdmin):
         elif obj.salary_max:
             return f"до {obj.salary_max}"
         return "—"
+
+
+@admin.register(models.ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "status",
+        "export_format",
+        "company",
+        "row_count",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "export_format"]
+    list_select_related = ["company"]
+    raw_id_fields = ["company", "requested_by"]
+    readonly_fields = [
+        "status",
+        "file",
+        "row_count",
+        "error",
+        "attempts",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
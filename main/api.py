@@ -1,38 +1,107 @@
-from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters as rest_framework_filters
-from rest_framework import status, viewsets
+from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from django.http import FileResponse
 
-from . import filters, models, pagination, serializers
+from . import (
+    bulk,
+    caching,
+    exports,
+    facets,
+    fieldsets,
+    filters,
+    models,
+    pagination,
+    readserializers,
+    serializers,
+)
 
+FACETS_IGNORED_PARAMS = (
+    "page",
+    "page_size",
+    "cursor",
+    "count",
+    "ordering",
+    "format",
+    "fields",
+    "expand",
+)
 
-class CompanyViewSet(viewsets.ModelViewSet):
-    queryset = models.Company.objects.all()
+
+class CompanyViewSet(
+    caching.CachedResponseMixin,
+    caching.ConditionalGetMixin,
+    readserializers.ValuesReadMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = models.Company.objects.order_by("id")
     serializer_class = serializers.CompanySerializer
-    pagination_class = pagination.StandardResultsSetPagination
+    pagination_class = pagination.KeysetCursorPagination
+    cache_namespaces = {"list": caching.COMPANIES, "retrieve": caching.COMPANY}
 
 
-class VacancyViewSet(viewsets.ModelViewSet):
+class VacancyViewSet(
+    caching.CachedResponseMixin,
+    caching.ConditionalGetMixin,
+    fieldsets.SparseFieldsetMixin,
+    readserializers.ValuesReadMixin,
+    viewsets.ModelViewSet,
+):
     queryset = models.Vacancy.objects.all()
     serializer_class = serializers.VacancySerializer
-    pagination_class = pagination.StandardResultsSetPagination
+    pagination_class = pagination.KeysetCursorPagination
+    cache_namespaces = {
+        "list": caching.VACANCIES,
+        "active": caching.VACANCIES,
+        "retrieve": caching.VACANCY,
+    }
+    conditional_timestamp_fields = ("updated_at", "company__updated_at")
     filterset_class = filters.VacancyFilter
     filter_backends = [
-        DjangoFilterBackend,
-        rest_framework_filters.SearchFilter,
+        filters.FacetFilterBackend,
+        filters.FullTextSearchFilter,
         rest_framework_filters.OrderingFilter,
     ]
-    search_fields = ["title", "description", "company__name"]
-    ordering_fields = ["salary_max", "salary_min"]
+    ordering_fields = ["salary_max", "salary_min", "created_at"]
+    # Параметры VacancyFilter, совпадающие с фасетами: фасет считается без
+    # своего фильтра (main.facets.disjunctive).
+    facet_params = ("city",)
+    facet_excluded = ()
+    # Карточка в списке: без длинных текстов, компания — id, name, logo и его
+    # уменьшенные копии.
+    list_fields = (
+        "id",
+        "title",
+        "description",
+        "company",
+        "field",
+        "is_active",
+        "salary_min",
+        "salary_max",
+        "city",
+        "address",
+        "employment_type",
+        "experience",
+        "schedule",
+        "created_at",
+        "updated_at",
+    )
+    deferrable_fields = (
+        "description",
+        "requirements",
+        "responsibilities",
+        "conditions",
+    )
+    expandable_fields = {"company": ("id", "name", "logo", "logo_variants")}
 
     def get_queryset(self):
         base_q = Q()
 
         if self.request.query_params.get("my") == "true":
-            if self.request.user.is_authenticated and hasattr(self.request.user, "company"):
-                base_q &= Q(company=self.request.user.company)
+            if self.request.user.is_authenticated and hasattr(self.request.user, "company_id"):
+                base_q &= Q(company_id=self.request.user.company_id)
             else:
                 return models.Vacancy.objects.none()
 
@@ -41,22 +110,173 @@ class VacancyViewSet(viewsets.ModelViewSet):
             is_active = active_param.lower() == "true"
             base_q &= Q(is_active=is_active)
 
-        return models.Vacancy.objects.filter(base_q)
+        return models.Vacancy.objects.filter(base_q).select_related("company")
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if isinstance(getattr(response, "data", None), dict):
+            response.data["facets"] = self.get_facets()
+        return response
+
+    def get_facets(self):
+        params = {
+            key: values
+            for key, values in self.request.query_params.lists()
+            if key not in FACETS_IGNORED_PARAMS
+        }
+        if params.get("my") == ["true"] and self.request.user.is_authenticated:
+            params["company"] = [str(self.request.user.company_id)]
+        facet_querysets = {
+            name: self.facet_queryset(name)
+            for name in self.facet_params
+            if self.request.query_params.get(name)
+        }
+        return facets.get_facets(
+            self.filter_queryset(self.get_queryset()), params, "api", facet_querysets
+        )
+
+    def facet_queryset(self, name):
+        self.facet_excluded = (name,)
+        try:
+            return self.filter_queryset(self.get_queryset())
+        finally:
+            self.facet_excluded = ()
 
     @action(detail=False, methods=["GET"], url_path="active")
     def active(self, request):
-        active_vacancies = self.get_queryset().filter(is_active=True)
-        page = self.paginate_queryset(active_vacancies)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(active_vacancies, many=True)
-        return Response(serializer.data)
+        active_vacancies = self.apply_fieldset(
+            self.get_queryset().filter(is_active=True)
+        )
+        return self.list_response(active_vacancies)
 
     @action(detail=True, methods=["POST"], url_path="archive")
     def archive(self, request, pk=None):
         vacancy = self.get_object()
         vacancy.is_active = False
-        vacancy.save(update_fields=["is_active"])
+        vacancy.save(update_fields=["is_active", "updated_at"])
         serializer = self.get_serializer(vacancy)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["POST", "PATCH"], url_path="bulk")
+    def bulk(self, request):
+        """
+        POST — создать список вакансий, PATCH — частично обновить список
+        (у каждого элемента обязателен ``id``). Ошибки возвращаются списком
+        той же длины, что и запрос: ``{}`` для корректных элементов.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "Ожидается список объектов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > bulk.MAX_ITEMS:
+            return Response(
+                {"detail": f"Не больше {bulk.MAX_ITEMS} объектов за запрос."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        context = {
+            **self.get_serializer_context(),
+            "related_objects": bulk.related_objects(request.data),
+        }
+        if request.method == "POST":
+            return self.bulk_create(request, context)
+        return self.bulk_partial_update(request, context)
+
+    def bulk_create(self, request, context):
+        serializer = self.get_serializer_class()(
+            data=request.data, many=True, context=context
+        )
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        created = bulk.create_vacancies(serializer.validated_data, request.user)
+        data = self.get_serializer_class()(created, many=True, context=context).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def bulk_partial_update(self, request, context):
+        ids = [
+            item.get("id") if isinstance(item, dict) else None
+            for item in request.data
+        ]
+        instances = self.get_queryset().in_bulk(
+            [pk for pk in ids if type(pk) is int]
+        )
+        bound, errors = [], []
+        for pk, item in zip(ids, request.data, strict=True):
+            if pk is None or pk not in instances:
+                message = "Обязательное поле." if pk is None else "Вакансия не найдена."
+                errors.append({"id": [message]})
+                continue
+            serializer = self.get_serializer_class()(
+                instances[pk], data=item, partial=True, context=context
+            )
+            serializer.is_valid()
+            bound.append(serializer)
+            errors.append(serializer.errors)
+        if any(errors):
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = bulk.update_vacancies(
+            [(serializer.instance, serializer.validated_data) for serializer in bound],
+            request.user,
+        )
+        data = self.get_serializer_class()(updated, many=True, context=context).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["POST"], url_path="bulk-archive")
+    def bulk_archive(self, request):
+        return self.bulk_set_active(request, is_active=False)
+
+    @action(detail=False, methods=["POST"], url_path="bulk-unarchive")
+    def bulk_unarchive(self, request):
+        return self.bulk_set_active(request, is_active=True)
+
+    def bulk_set_active(self, request, is_active):
+        serializer = serializers.VacancyIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated, missing = bulk.set_active(
+            self.get_queryset(),
+            serializer.validated_data["ids"],
+            is_active,
+            request.user,
+        )
+        return Response(
+            {"updated": [vacancy.pk for vacancy in updated], "not_found": missing},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ExportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = models.ExportJob.objects.all()
+    serializer_class = serializers.ExportJobSerializer
+    pagination_class = pagination.StandardResultsSetPagination
+    # Выгрузки видит только тот, кто их запросил.
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return models.ExportJob.objects.filter(requested_by=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(requested_by=self.request.user)
+
+    @action(detail=True, methods=["GET"], url_path="download")
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != "done" or not job.file:
+            return Response(
+                {"detail": "Файл ещё не готов", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        content_type, _ = exports.EXPORT_FORMATS[job.export_format]
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=job.file.name.rsplit("/", 1)[-1],
+            content_type=content_type,
+        )
@@ -0,0 +1,351 @@
+import contextlib
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+WORKER_CLASSES = ("sync", "gthread", "uvicorn")
+
+# Метрики, по которым сравниваем с эталоном, и направление «хуже».
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries", "peak_memory_kb")
+COMPARED_HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+
+    def url(self, objects):
+        return self.path.format(**objects)
+
+
+SCENARIOS = (
+    Scenario("html_vacancies", "/vacancies"),
+    Scenario(
+        "html_vacancies_filtered", "/vacancies?employment_type=full&experience=1-3"
+    ),
+    Scenario("html_vacancies_search", "/vacancies?position=менеджер"),
+    Scenario("html_vacancy", "/vacancies/{vacancy}"),
+    Scenario("html_companies", "/companies"),
+    Scenario("export_csv", "/export/vacancies/company/{company}/?format=csv"),
+    Scenario("export_xlsx", "/export/vacancies/company/{company}/"),
+    Scenario("api_vacancies", "/api/vacancies/"),
+    Scenario("api_vacancies_page100", "/api/vacancies/?page_size=100&expand=company"),
+    Scenario("api_vacancies_filtered", "/api/vacancies/?employment_type=full"),
+    Scenario("api_vacancies_search", "/api/vacancies/?search=менеджер"),
+    Scenario("api_vacancy", "/api/vacancies/{vacancy}/"),
+    Scenario("api_companies", "/api/companies/"),
+    Scenario("api_company", "/api/companies/{company}/"),
+)
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed, errors=0):
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": _round(percentile(latencies_ms, 50)),
+        "p95_ms": _round(percentile(latencies_ms, 95)),
+        "p99_ms": _round(percentile(latencies_ms, 99)),
+        "mean_ms": _round(sum(latencies_ms) / len(latencies_ms)) if latencies else None,
+        "throughput_rps": _round(len(latencies) / elapsed) if elapsed else None,
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def _consume(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+
+
+def run_client(scenario, objects, iterations, warmup):
+    """
+    Прогоняет сценарий через тестовый клиент Django в текущем процессе:
+    задержки, число SQL-запросов на запрос и пик памяти Python (tracemalloc).
+    """
+    client = Client()
+    url = scenario.url(objects)
+    errors = 0
+    for _ in range(warmup):
+        _consume(client.get(url))
+
+    latencies = []
+    queries = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = client.get(url)
+                _consume(response)
+                latencies.append(time.perf_counter() - request_started)
+            queries = max(queries, len(captured))
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        **summarize(latencies, elapsed, errors),
+        "queries": queries,
+        "peak_memory_kb": round(peak / 1024),
+    }
+
+
+def _fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            while response.read(64 * 1024):
+                pass
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_http(base_url, scenario, objects, requests, concurrency, warmup):
+    """Нагрузочный прогон по HTTP: ``concurrency`` потоков, ``requests`` запросов."""
+    url = base_url + urllib.parse.quote(scenario.url(objects), safe="/?=&")
+    for _ in range(warmup):
+        _fetch(url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_fetch, [url] * requests))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, ok in results if ok]
+    return summarize(latencies, elapsed, errors=len(results) - len(latencies))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """Локальный сервер приложения на свободном порту на время прогона."""
+
+    name = None
+
+    def __init__(self, workers=2, env=None):
+        self.port = free_port()
+        self.workers = workers
+        self.env = {**os.environ, **(env or {})}
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def command(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command(), env=self.env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} завершился при запуске")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"{self.name} не начал принимать соединения за 30 с")
+
+    def __exit__(self, *exc_info):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+    def peak_memory_kb(self):
+        """Сумма пиков RSS (VmHWM) процессов сервера; только Linux."""
+        total = 0
+        for pid in [self.process.pid, *self._children(self.process.pid)]:
+            try:
+                status = Path(f"/proc/{pid}/status").read_text()
+            except OSError:
+                return None
+            for line in status.splitlines():
+                if line.startswith("VmHWM:"):
+                    total += int(line.split()[1])
+        return total
+
+    @staticmethod
+    def _children(pid):
+        children = []
+        for task in Path(f"/proc/{pid}/task").glob("*/children"):
+            children += [int(child) for child in task.read_text().split()]
+        return children
+
+
+class Gunicorn(Server):
+    """gunicorn с конфигурацией careercenter.gunicorn_conf."""
+
+    name = "gunicorn"
+
+    def __init__(self, workers=2, worker_class="sync", threads=None, env=None):
+        super().__init__(workers, env)
+        self.env.update(
+            {
+                "GUNICORN_BIND": f"127.0.0.1:{self.port}",
+                "GUNICORN_WORKER_CLASS": worker_class,
+                "WEB_CONCURRENCY": str(workers),
+                "GUNICORN_LOG_LEVEL": "warning",
+            }
+        )
+        if threads is not None:
+            self.env["GUNICORN_THREADS"] = str(threads)
+
+    def command(self):
+        return [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "python:careercenter.gunicorn_conf",
+        ]
+
+
+class Uvicorn(Server):
+    """uvicorn с конфигурацией careercenter.asgi_server (ASGI)."""
+
+    name = "uvicorn"
+
+    def __init__(self, workers=2, env=None):
+        super().__init__(workers, env)
+        self.env.update(
+            {
+                "ASGI_BIND": f"127.0.0.1:{self.port}",
+                "WEB_CONCURRENCY": str(workers),
+                "LOG_LEVEL": "WARNING",
+            }
+        )
+
+    def command(self):
+        return [sys.executable, "-m", "careercenter.asgi_server"]
+
+
+class SlowClients:
+    """
+    ``count`` медленных клиентов: каждый открывает соединение и досылает
+    заголовки запроса по строке раз в ``interval`` секунд, не завершая его.
+    Синхронный воркер, принявший такое соединение, занят им целиком, пока
+    не сработает таймаут; оборванные соединения открываются заново.
+    """
+
+    def __init__(self, port, count, interval=1.0):
+        self.port = port
+        self.count = count
+        self.interval = interval
+        self.sockets = []
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.sockets = [self._connect() for _ in range(self.count)]
+        if self.sockets:
+            self.thread = threading.Thread(target=self._trickle, daemon=True)
+            self.thread.start()
+        return self
+
+    def _connect(self):
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        sock.sendall(b"GET /vacancies HTTP/1.1\r\nHost: 127.0.0.1\r\n")
+        return sock
+
+    def _trickle(self):
+        while not self.stopped.wait(self.interval):
+            for index, sock in enumerate(self.sockets):
+                try:
+                    sock.sendall(b"X-Slow-Client: 1\r\n")
+                except OSError:
+                    # Сервер оборвал соединение по таймауту — открываем новое,
+                    # чтобы нагрузка держалась весь прогон.
+                    sock.close()
+                    with contextlib.suppress(OSError):
+                        self.sockets[index] = self._connect()
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        for sock in self.sockets:
+            sock.close()
+
+
+def compare(results, baseline, tolerance):
+    """
+    Сравнивает результаты с эталоном. Возвращает список регрессий: метрика
+    хуже эталона больше чем на ``tolerance`` (доля, 0.2 = 20%).
+    """
+    regressions = []
+    for mode, scenarios in results.items():
+        for name, metrics in scenarios.items():
+            reference = baseline.get(mode, {}).get(name)
+            if not reference:
+                continue
+            for metric in COMPARED_METRICS + COMPARED_HIGHER_IS_BETTER:
+                current, expected = metrics.get(metric), reference.get(metric)
+                if current is None or not expected:
+                    continue
+                change = (current - expected) / expected
+                if metric in COMPARED_HIGHER_IS_BETTER:
+                    change = -change
+                if change > tolerance:
+                    regressions.append(
+                        {
+                            "mode": mode,
+                            "scenario": name,
+                            "metric": metric,
+                            "baseline": expected,
+                            "current": current,
+                            "change": round(change, 3),
+                        }
+                    )
+    return regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fileobj:
+        return json.load(fileobj)
+
+
+def dump(data, path):
+    with open(path, "w", encoding="utf-8") as fileobj:
+        json.dump(data, fileobj, ensure_ascii=False, indent=2)
+        fileobj.write("\n")
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from . import metrics, models, signals
+
+BATCH_SIZE = 500
+MAX_ITEMS = 1000
+
+RELATED_FIELDS = {
+    "company_id": models.Company,
+    "field": models.FieldOfStudy,
+}
+
+
+def related_objects(items):
+    """
+    Связанные объекты всех элементов пачки одним запросом на модель —
+    для ``PrefetchedPrimaryKeyRelatedField`` в контексте сериализатора.
+    """
+    result = {}
+    for key, model in RELATED_FIELDS.items():
+        ids = {
+            str(item[key])
+            for item in items
+            if isinstance(item, dict) and str(item.get(key, "")).isdigit()
+        }
+        objects = model.objects.in_bulk(ids) if ids else {}
+        result[model] = {str(pk): obj for pk, obj in objects.items()}
+    return result
+
+
+def _history_user(user):
+    return user if user is not None and user.is_authenticated else None
+
+
+def create_vacancies(validated_data, user=None):
+    """Создаёт вакансии и их исторические записи пачками в одной транзакции."""
+    vacancies = [models.Vacancy(**attrs) for attrs in validated_data]
+    with transaction.atomic():
+        created = bulk_create_with_history(
+            vacancies,
+            models.Vacancy,
+            batch_size=BATCH_SIZE,
+            default_user=_history_user(user),
+        )
+        metrics.history_written(models.Vacancy, len(created))
+        signals.vacancies_changed(vacancy.pk for vacancy in created)
+    return created
+
+
+def update_vacancies(changes, user=None):
+    """
+    Применяет ``[(вакансия, validated_data), ...]`` одним ``bulk_update``.
+
+    ``bulk_update`` не вызывает ``save()``, поэтому ``updated_at`` и история
+    проставляются здесь же.
+    """
+    now = timezone.now()
+    fields = {"updated_at"}
+    vacancies = []
+    for vacancy, attrs in changes:
+        for name, value in attrs.items():
+            setattr(vacancy, name, value)
+        vacancy.updated_at = now
+        fields.update(attrs)
+        vacancies.append(vacancy)
+    if not vacancies:
+        return vacancies
+    with transaction.atomic():
+        bulk_update_with_history(
+            vacancies,
+            models.Vacancy,
+            sorted(fields),
+            batch_size=BATCH_SIZE,
+            default_user=_history_user(user),
+            default_date=now,
+        )
+        metrics.history_written(models.Vacancy, len(vacancies))
+        signals.vacancies_changed(vacancy.pk for vacancy in vacancies)
+    return vacancies
+
+
+def set_active(queryset, ids, is_active, user=None):
+    """
+    Архивирует (``is_active=False``) или возвращает из архива вакансии
+    с указанными id. Возвращает ``(изменённые, ненайденные id)``.
+    """
+    found = queryset.select_related("company").in_bulk(ids)
+    missing = [pk for pk in ids if pk not in found]
+    changes = [
+        (vacancy, {"is_active": is_active})
+        for vacancy in found.values()
+        if vacancy.is_active != is_active
+    ]
+    return update_vacancies(changes, user), missing
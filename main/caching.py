@@ -0,0 +1,428 @@
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, has_vary_header
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import metrics
+
+# Версии хранятся в кэше по умолчанию и должны быть видны всем процессам.
+VERSION_TIMEOUT = None
+
+# Пространства имён, по которым сбрасывается кэш (см. main.signals):
+# списки целиком и отдельные объекты ("vacancy:<id>", "company:<id>").
+VACANCIES = "vacancies"
+COMPANIES = "companies"
+VACANCY = "vacancy"
+COMPANY = "company"
+
+
+def object_namespace(namespace, object_id):
+    return f"{namespace}:{object_id}"
+
+
+def _version_key(namespace):
+    return f"version:{namespace}"
+
+
+def get_version(namespace):
+    """Текущее поколение данных пространства имён (для ключей кэша)."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, VERSION_TIMEOUT)
+        version = cache.get(key, 1)
+    return version
+
+
+async def aget_version(namespace):
+    key = _version_key(namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, 1, VERSION_TIMEOUT)
+        version = await cache.aget(key, 1)
+    return version
+
+
+def bump_version(namespace):
+    """Инвалидирует все ключи пространства имён, построенные на get_version()."""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, VERSION_TIMEOUT)
+
+
+def normalized_query(params, ignore_values=("",)):
+    """Канонический вид GET-параметров: без пустых значений, в порядке ключей."""
+    items = sorted(
+        (key, value)
+        for key, values in params.lists()
+        for value in values
+        if value not in ignore_values
+    )
+    return "&".join(f"{key}={value}" for key, value in items)
+
+
+class ResponseCache:
+    """
+    Кэш готовых ответов для анонимных GET/HEAD-запросов.
+
+    Ключ строится из пространства имён, его текущей версии, версии объекта
+    (для детальных страниц), пути и нормализованных GET-параметров. Запись
+    в модели увеличивает версию — старые ключи просто перестают читаться.
+    Бэкенд выбирается настройкой ``RESPONSE_CACHE_ALIAS`` (см. ``CACHES``).
+
+    Ключи ``version:<пространство>`` должны лежать в кэше, общем для всех
+    процессов (file, redis): с locmem версию увеличит только воркер,
+    обработавший запись, а остальные продолжат отдавать старые ответы.
+    """
+
+    def __init__(self, alias=None, timeout=None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def backend(self):
+        return caches[
+            self.alias or getattr(settings, "RESPONSE_CACHE_ALIAS", "default")
+        ]
+
+    def get_timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    @staticmethod
+    def is_anonymous_read(request):
+        if request.method not in ("GET", "HEAD"):
+            return False
+        # Basic/Token-авторизацию DRF проверяет позже, уже во view: по
+        # request.user такой клиент выглядит анонимным.
+        return "HTTP_AUTHORIZATION" not in request.META
+
+    @classmethod
+    def is_cacheable_request(cls, request):
+        if not cls.is_anonymous_read(request):
+            return False
+        user = getattr(request, "user", None)
+        return user is None or not user.is_authenticated
+
+    @classmethod
+    async def ais_cacheable_request(cls, request):
+        if not cls.is_anonymous_read(request):
+            return False
+        # request.user в async-коде обращаться к БД не может.
+        user = await request.auser() if hasattr(request, "auser") else None
+        return user is None or not user.is_authenticated
+
+    @staticmethod
+    def is_cacheable_response(request, response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        if response.cookies:
+            return False
+        # В ответе CSRF-токен (get_token()): cookie с ним CsrfViewMiddleware
+        # поставит уже после кэша, и другой клиент получил бы чужой токен.
+        if request.META.get("CSRF_COOKIE_NEEDS_UPDATE") or request.META.get(
+            "CSRF_COOKIE_USED"
+        ):
+            return False
+        # Ответ, зависящий от сессии, делить между клиентами нельзя.
+        return not has_vary_header(response, "Cookie")
+
+    def key(self, request, namespace, object_id=None):
+        versions = [get_version(namespace)]
+        if object_id is not None:
+            versions.append(get_version(object_namespace(namespace, object_id)))
+        return self.build_key(request, namespace, versions, object_id)
+
+    async def akey(self, request, namespace, object_id=None):
+        versions = [await aget_version(namespace)]
+        if object_id is not None:
+            versions.append(await aget_version(object_namespace(namespace, object_id)))
+        return self.build_key(request, namespace, versions, object_id)
+
+    @staticmethod
+    def build_key(request, namespace, versions, object_id):
+        parts = [namespace, str(versions[0])]
+        if object_id is not None:
+            parts += [str(object_id), str(versions[1])]
+        parts += [
+            request.path,
+            normalized_query(request.GET),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        return f"response:{namespace}:{digest}"
+
+    def get(self, key):
+        response = self.backend.get(key)
+        metrics.cache_result("response", response is not None)
+        return response
+
+    async def aget(self, key):
+        response = await self.backend.aget(key)
+        metrics.cache_result("response", response is not None)
+        return response
+
+    def set(self, key, response):
+        self.backend.set(key, self.prepare(response), self.get_timeout())
+
+    async def aset(self, key, response):
+        await self.backend.aset(key, self.prepare(response), self.get_timeout())
+
+    @staticmethod
+    def prepare(response):
+        if hasattr(response, "render") and callable(response.render):
+            response.render()
+        return set_etag(response)
+
+
+def set_etag(response):
+    if not response.has_header("ETag") and not response.streaming:
+        digest = hashlib.md5(response.content, usedforsecurity=False).hexdigest()
+        response["ETag"] = f'"{digest}"'
+    return response
+
+
+def set_last_modified(response, timestamp):
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp.timestamp())
+    return response
+
+
+def conditional(request, response):
+    """Превращает ответ в 304, если у клиента уже актуальная копия."""
+    last_modified = parse_http_date_safe(response.get("Last-Modified", ""))
+    return get_conditional_response(
+        request,
+        etag=response.get("ETag"),
+        last_modified=last_modified,
+        response=response,
+    )
+
+
+response_cache = ResponseCache()
+
+
+def cache_response(namespace, object_kwarg=None):
+    """
+    Декоратор функционального представления: отдаёт анонимным клиентам
+    закэшированный ответ и поддерживает If-None-Match / If-Modified-Since.
+    Работает и с async-представлениями (кэш читается через aget/aset).
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not await response_cache.ais_cacheable_request(request):
+                    return await view(request, *args, **kwargs)
+
+                object_id = kwargs.get(object_kwarg) if object_kwarg else None
+                key = await response_cache.akey(request, namespace, object_id)
+                response = await response_cache.aget(key)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if not response_cache.is_cacheable_response(request, response):
+                        return response
+                    await response_cache.aset(key, response)
+                return conditional(request, response)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not response_cache.is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            object_id = kwargs.get(object_kwarg) if object_kwarg else None
+            key = response_cache.key(request, namespace, object_id)
+            response = response_cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if not response_cache.is_cacheable_response(request, response):
+                    return response
+                response_cache.set(key, response)
+            return conditional(request, response)
+
+        return wrapper
+
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    То же для DRF-viewset: ``cache_namespaces`` сопоставляет действие
+    (``list``, ``retrieve``, ...) с пространством имён кэша.
+
+    При ``ASYNC_VIEWS`` маршруты с кэшируемыми действиями получают
+    async-представление: попадание в кэш отдаётся прямо из цикла событий,
+    без потока, и только промах уходит в синхронный DRF.
+    """
+
+    cache_namespaces = {}
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        namespaces = {
+            method: cls.cache_namespaces[action]
+            for method, action in (actions or {}).items()
+            if action in cls.cache_namespaces
+        }
+        if not namespaces or not getattr(settings, "ASYNC_VIEWS", False):
+            return view
+        return async_cached_view(
+            view, namespaces, cls.lookup_url_kwarg or cls.lookup_field
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, "action_map", {}).get(request.method.lower())
+        namespace = self.cache_namespaces.get(action)
+        if namespace is None or not response_cache.is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        # Промах уже зафиксирован async-представлением — второй раз не читаем.
+        key = getattr(request, "_response_cache_miss", None)
+        if key is not None:
+            response = None
+        else:
+            object_id = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            key = response_cache.key(request, namespace, object_id)
+            response = response_cache.get(key)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if not response_cache.is_cacheable_response(request, response):
+                return response
+            response_cache.set(key, response)
+        return conditional(request, response)
+
+
+def async_cached_view(view, namespaces, object_kwarg):
+    """
+    Async-обёртка синхронного представления с кэшем ответов: ``namespaces`` —
+    пространство имён кэша для каждого HTTP-метода.
+    """
+    sync_view = sync_to_async(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        namespace = namespaces.get(request.method.lower())
+        if namespace is not None and await response_cache.ais_cacheable_request(
+            request
+        ):
+            key = await response_cache.akey(
+                request, namespace, kwargs.get(object_kwarg)
+            )
+            response = await response_cache.aget(key)
+            if response is not None:
+                return conditional(request, response)
+            request._response_cache_miss = key
+        if hasattr(request, "auser"):
+            # Пользователь уже прочитан auser(); DRF не будет читать сессию заново.
+            request.user = await request.auser()
+        return await sync_view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """
+    ETag для list/retrieve DRF-viewset без сериализации, Last-Modified —
+    только для объекта.
+
+    Валидаторы считаются дешёвым запросом: для списка — агрегат
+    ``MAX(<поля из conditional_timestamp_fields>)`` по отфильтрованному
+    queryset и ``COUNT(*)``, если пагинатор всё равно считает строки точно
+    (иначе удаление строки видно по поколению ``cache_namespaces["list"]``),
+    для объекта — его метки времени. Если копия клиента актуальна, ответ 304
+    отдаётся до запуска сериализатора.
+
+    У списка ``MAX(updated_at)`` не меняется при удалении строки или
+    архивации мимо ``updated_at``, поэтому клиент только с
+    If-Modified-Since получил бы устаревший 304: список сверяется по ETag.
+    """
+
+    conditional_timestamp_fields = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        aggregates = {
+            f"max_{index}": Max(field)
+            for index, field in enumerate(self.conditional_timestamp_fields)
+        }
+        namespace = getattr(self, "cache_namespaces", {}).get("list")
+        exact = namespace is None or self.get_count_mode(request) == "exact"
+        if exact:
+            aggregates["count"] = Count("pk")
+        values = queryset.aggregate(**aggregates)
+        # Пагинация возьмёт это число вместо своего COUNT(*).
+        self.filtered_count = values.pop("count", None)
+        timestamps = list(values.values())
+        generation = self.filtered_count if exact else get_version(namespace)
+        etag, _ = self.conditional_validators(
+            request, [generation, *timestamps], timestamps
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return self.set_conditional_headers(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        timestamps = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list(*self.conditional_timestamp_fields)
+            .first()
+        )
+        if timestamps is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag, last_modified = self.conditional_validators(
+            request, [kwargs[lookup_url_kwarg], *timestamps], timestamps
+        )
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        return self.set_conditional_headers(response, etag, last_modified)
+
+    def get_count_mode(self, request):
+        """Режим подсчёта строк пагинатора (``?count=``); по умолчанию exact."""
+        get_count_mode = getattr(self.paginator, "get_count_mode", None)
+        return get_count_mode(request) if get_count_mode is not None else "exact"
+
+    def conditional_validators(self, request, parts, timestamps):
+        user = getattr(request, "user", None)
+        parts = [
+            *(
+                part.isoformat() if hasattr(part, "isoformat") else part
+                for part in parts
+            ),
+            request.path,
+            normalized_query(request.query_params),
+            request.META.get("HTTP_ACCEPT", ""),
+            user.pk if user is not None and user.is_authenticated else "",
+        ]
+        digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return f'W/"{digest}"', last_modified
+
+    @staticmethod
+    def set_conditional_headers(response, etag, last_modified):
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -0,0 +1,92 @@
+import csv
+import io
+import tempfile
+
+from openpyxl import Workbook
+
+from . import models
+from .resources import VacancyResource
+
+CHUNK_SIZE = 2000
+STREAM_BLOCK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx",
+    ),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "tsv": ("text/tab-separated-values; charset=utf-8", "tsv"),
+}
+
+
+def company_vacancies(company_id):
+    return models.Vacancy.objects.filter(company_id=company_id, is_active=True)
+
+
+def iter_rows(queryset, resource=None, chunk_size=CHUNK_SIZE):
+    """
+    Строки выгрузки по одной: сначала заголовки, затем данные.
+
+    Вакансии читаются пачками по ``chunk_size`` вместе с компанией
+    (``select_related``), значения готовит ``VacancyResource``. На Postgres
+    ``iterator()`` читает через серверный курсор, и вся выборка в памяти
+    процесса не оказывается.
+    """
+    resource = resource or VacancyResource()
+    export_fields = resource.get_export_fields()
+    yield resource.get_export_headers()
+    queryset = queryset.select_related("company").iterator(chunk_size=chunk_size)
+    for vacancy in queryset:
+        yield [resource.export_field(field, vacancy) for field in export_fields]
+
+
+def iter_delimited(rows, delimiter=","):
+    """Кодирует строки в CSV/TSV и отдаёт их блоками по ~64 КБ."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+    # BOM, чтобы Excel сразу открывал кириллицу в UTF-8.
+    buffer.write("\ufeff")
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= STREAM_BLOCK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def write_xlsx(rows, fileobj):
+    # write-only режим openpyxl сбрасывает строки на диск, а не держит их в памяти.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Вакансии")
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def iter_xlsx(rows):
+    with tempfile.TemporaryFile() as fileobj:
+        write_xlsx(rows, fileobj)
+        fileobj.seek(0)
+        while block := fileobj.read(STREAM_BLOCK_SIZE):
+            yield block
+
+
+def iter_export(rows, export_format):
+    if export_format == "xlsx":
+        return iter_xlsx(rows)
+    if export_format == "tsv":
+        return iter_delimited(rows, delimiter="\t")
+    if export_format == "csv":
+        return iter_delimited(rows)
+    raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+
+
+def write_export(rows, export_format, fileobj):
+    if export_format == "xlsx":
+        write_xlsx(rows, fileobj)
+        return
+    for block in iter_export(rows, export_format):
+        fileobj.write(block)
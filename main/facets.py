@@ -0,0 +1,167 @@
+import hashlib
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from . import caching, lookups, metrics
+
+SALARY_BUCKETS = (
+    ("lt50", "До 50 000 ₽", None, 50000),
+    ("50-100", "50 000 – 100 000 ₽", 50000, 100000),
+    ("100-200", "100 000 – 200 000 ₽", 100000, 200000),
+    ("200+", "От 200 000 ₽", 200000, None),
+)
+SALARY_UNKNOWN = "none"
+CITY_LIMIT = 20
+
+FACET_COLUMNS = {
+    "field": "field_id",
+    "employment_type": "employment_type",
+    "experience": "experience",
+    "schedule": "schedule",
+    "city": "city",
+    "salary": "salary_bucket",
+}
+
+
+def salary_bucket():
+    salary = Coalesce("salary_min", "salary_max")
+    whens = []
+    for value, _, low, high in SALARY_BUCKETS:
+        condition = Q()
+        if low is not None:
+            condition &= Q(salary_value__gte=low)
+        if high is not None:
+            condition &= Q(salary_value__lt=high)
+        whens.append(When(condition, then=Value(value)))
+    return salary, Case(*whens, default=Value(SALARY_UNKNOWN), output_field=CharField())
+
+
+def disjunctive(queryset, filters):
+    """
+    Применяет ``filters`` (имя фасета → Q) к ``queryset``. Возвращает пару:
+    queryset со всеми фильтрами и словарь «фасет → queryset без его
+    собственного фильтра» для compute(): выбранный вариант не обнуляет
+    соседние, и фасетом можно переключать значения.
+    """
+    facet_querysets = {
+        name: queryset.filter(
+            *(condition for other, condition in filters.items() if other != name)
+        )
+        for name in filters
+    }
+    return queryset.filter(*filters.values()), facet_querysets
+
+
+def _counts(queryset, name, column):
+    if column == FACET_COLUMNS["salary"]:
+        salary, bucket = salary_bucket()
+        queryset, expression = queryset.alias(salary_value=salary), bucket
+    else:
+        expression = F(column)
+    return (
+        queryset.order_by()
+        .values(facet=Value(name), value=Cast(expression, CharField()))
+        .annotate(count=Count("id"))
+    )
+
+
+def compute(queryset, facet_querysets=None):
+    """
+    Считает фасеты одним запросом: UNION ALL группировок по каждому столбцу
+    фасета, так что строк в ответе не больше, чем вариантов. Фасет из
+    ``facet_querysets`` считается по своему queryset (см. disjunctive()),
+    остальные и total — по ``queryset``.
+    """
+    facet_querysets = facet_querysets or {}
+    parts = [
+        _counts(facet_querysets.get(name, queryset), name, column)
+        for name, column in FACET_COLUMNS.items()
+    ]
+    total = queryset.order_by().values(facet=Value("total"), value=Value(""))
+    groups = total.annotate(count=Count("id")).union(*parts, all=True)
+
+    counters = {name: Counter() for name in (*FACET_COLUMNS, "total")}
+    for group in groups:
+        counters[group["facet"]][group["value"]] += group["count"]
+
+    return {
+        "total": counters["total"][""],
+        "field": [
+            {
+                "value": field.id,
+                "label": field.name,
+                "count": counters["field"][str(field.id)],
+            }
+            for field in lookups.fields_of_study.all()
+        ],
+        "employment_type": _choice_facet(
+            lookups.EMPLOYMENT_TYPES, counters["employment_type"]
+        ),
+        "experience": _choice_facet(lookups.EXPERIENCE, counters["experience"]),
+        "schedule": _choice_facet(lookups.SCHEDULES, counters["schedule"]),
+        "city": [
+            {"value": city, "label": city, "count": count}
+            for city, count in counters["city"].most_common(CITY_LIMIT)
+            if city
+        ],
+        "salary": [
+            {"value": value, "label": label, "count": counters["salary"][value]}
+            for value, label, _, _ in SALARY_BUCKETS
+        ],
+    }
+
+
+def _choice_facet(table, counter):
+    return [
+        {"value": value, "label": label, "count": counter[value]}
+        for value, label in table
+    ]
+
+
+def signature(params):
+    """Нормализованная подпись набора фильтров для ключа кэша."""
+    items = sorted(
+        (key, value)
+        for key, values in params.items()
+        for value in values
+        if value not in ("", "-1")
+    )
+    raw = "&".join(f"{key}={value}" for key, value in items)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_facets(queryset, params, scope="api", facet_querysets=None):
+    """
+    Фасеты для отфильтрованного queryset с кэшированием по подписи фильтров.
+
+    ``params`` — словарь «имя фильтра → список значений», описывающий фильтры,
+    уже применённые к ``queryset``; ``scope`` разделяет наборы фильтров с
+    разной семантикой (HTML-страница и API); ``facet_querysets`` — см.
+    compute(). Кэш сбрасывается при любом изменении вакансий (см.
+    ``main.signals``).
+    """
+    version = caching.get_version(caching.VACANCIES)
+    key = f"facets:{scope}:{version}:{signature(params)}"
+    result = cache.get(key)
+    metrics.cache_result("facets", result is not None)
+    if result is None:
+        result = compute(queryset, facet_querysets)
+        cache.set(key, result, getattr(settings, "FACETS_CACHE_TIMEOUT", 600))
+    return result
+
+
+async def aget_facets(queryset, params, scope="api", facet_querysets=None):
+    """get_facets() для async-представлений: подсчёт выполняется в потоке."""
+    version = await caching.aget_version(caching.VACANCIES)
+    key = f"facets:{scope}:{version}:{signature(params)}"
+    result = await cache.aget(key)
+    metrics.cache_result("facets", result is not None)
+    if result is None:
+        result = await sync_to_async(compute)(queryset, facet_querysets)
+        await cache.aset(key, result, getattr(settings, "FACETS_CACHE_TIMEOUT", 600))
+    return result
@@ -0,0 +1,111 @@
+from rest_framework import exceptions
+
+SPARSE_ACTIONS = ("list", "active", "retrieve")
+
+
+def parse_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=`` и ``?expand=`` для чтения DRF-viewset.
+
+    ``fields`` — поля ответа через запятую, ``expand`` — вложенные объекты,
+    нужные целиком. Без параметров список отдаёт ``list_fields``, а
+    вложенные объекты ``expandable_fields`` — в кратком виде; объект
+    отдаётся полностью, как раньше.
+
+    Тот же набор полей задаёт и запрос: столбцы ``deferrable_fields``, которых
+    нет в ответе, не читаются, связанная модель присоединяется только если
+    она в ответе, и у краткой формы — только её столбцы.
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+    list_fields = None
+    deferrable_fields = ()
+    # Поле → поля краткой формы вложенного объекта.
+    expandable_fields = {}
+
+    def get_fieldset(self):
+        """Пара (поля ответа или None — все, раскрытые вложенные объекты)."""
+        if getattr(self, "_fieldset", None) is None:
+            self._fieldset = self.build_fieldset()
+        return self._fieldset
+
+    def build_fieldset(self):
+        if self.action not in SPARSE_ACTIONS:
+            return None, set(self.expandable_fields)
+        params = self.request.query_params
+
+        fields = None
+        if self.fields_query_param in params:
+            fields = parse_names(params[self.fields_query_param])
+            serializer = self.get_serializer_class()()
+            readable = {
+                name
+                for name, field in serializer.fields.items()
+                if not field.write_only
+            }
+            self.check_names(self.fields_query_param, fields, readable)
+            fields.add("id")
+        elif self.action != "retrieve" and self.list_fields is not None:
+            fields = set(self.list_fields)
+
+        if self.expand_query_param in params:
+            expand = parse_names(params[self.expand_query_param])
+            self.check_names(self.expand_query_param, expand, self.expandable_fields)
+        elif self.action == "retrieve":
+            expand = set(self.expandable_fields)
+        else:
+            expand = set()
+        return fields, expand
+
+    @staticmethod
+    def check_names(param, names, allowed):
+        unknown = names - set(allowed)
+        if unknown:
+            raise exceptions.ValidationError(
+                {
+                    param: [
+                        f"Неизвестные поля: {', '.join(sorted(unknown))}. "
+                        f"Допустимые: {', '.join(sorted(allowed))}"
+                    ]
+                }
+            )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in SPARSE_ACTIONS:
+            context["fields"], context["expand"] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        return self.apply_fieldset(super().filter_queryset(queryset))
+
+    def apply_fieldset(self, queryset):
+        if self.action not in SPARSE_ACTIONS:
+            return queryset
+        fields, expand = self.get_fieldset()
+
+        def selected(name):
+            return fields is None or name in fields
+
+        deferred = [name for name in self.deferrable_fields if not selected(name)]
+        related = []
+        for name, brief in self.expandable_fields.items():
+            if not selected(name):
+                continue
+            related.append(name)
+            if name not in expand:
+                model = queryset.model._meta.get_field(name).related_model
+                deferred += [
+                    f"{name}__{field.name}"
+                    for field in model._meta.concrete_fields
+                    if field.name not in brief and not field.primary_key
+                ]
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.defer(*deferred) if deferred else queryset
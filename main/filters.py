@@ -1,5 +1,10 @@
 import django_filters
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import BaseFilterBackend
 
+from . import search
 from .models import Vacancy
 
 
@@ -8,8 +13,44 @@ class VacancyFilter(django_filters.FilterSet):
 
     title = django_filters.CharFilter(lookup_expr="icontains")
 
-    city = django_filters.CharFilter(lookup_expr="iexact")
+    city = django_filters.CharFilter(method="filter_city")
 
     class Meta:
         model = Vacancy
         fields = []
+
+    def filter_city(self, queryset, name, value):
+        # Сравнение через LOWER(), чтобы запрос попадал в vacancy_active_city_idx.
+        return queryset.alias(city_lower=Lower(name)).filter(
+            city_lower=Lower(Value(value))
+        )
+
+
+class FacetFilterBackend(DjangoFilterBackend):
+    """
+    DjangoFilterBackend, пропускающий параметры из ``view.facet_excluded``:
+    так фасет считается без собственного фильтра (см. main.facets).
+    """
+
+    def get_filterset_kwargs(self, request, queryset, view):
+        kwargs = super().get_filterset_kwargs(request, queryset, view)
+        excluded = getattr(view, "facet_excluded", ())
+        if excluded:
+            kwargs["data"] = kwargs["data"].copy()
+            for name in excluded:
+                kwargs["data"].pop(name, None)
+        return kwargs
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Поиск ``?search=`` через полнотекстовый индекс вместо LIKE-сканов."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        # Если клиент задал ?ordering=, сортировка по релевантности не нужна.
+        order = not request.query_params.get("ordering")
+        return search.search_vacancies(queryset, query, order=order)
@@ -0,0 +1,114 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from . import metrics
+
+
+class Fragment:
+    """
+    Кэшируемый HTML-фрагмент объекта: карточка вакансии, плитка компании.
+
+    Ключ — id объекта, метки ``stamp_fields`` (``updated_at`` самого объекта
+    и связанных, чьи поля попадают в разметку) и хэш исходника шаблона,
+    поэтому изменение данных или шаблона просто даёт новый ключ. Все
+    фрагменты страницы читаются из кэша одним ``get_many``, рендерятся
+    только промахи. Шаблон фрагмента не должен зависеть от запроса.
+    """
+
+    def __init__(self, name, template_name, context_name, stamp_fields=("updated_at",)):
+        self.name = name
+        self.template_name = template_name
+        self.context_name = context_name
+        self.stamp_fields = stamp_fields
+
+    def cache(self):
+        return caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+
+    def timeout(self):
+        return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 86400)
+
+    def key(self, obj, digest):
+        stamps = ":".join(
+            str(_stamp(_resolve(obj, path))) for path in self.stamp_fields
+        )
+        return f"fragment:{self.name}:{digest}:{_resolve(obj, 'id')}:{stamps}"
+
+    def keys(self, objects, template):
+        digest = _digest(template)
+        return [self.key(obj, digest) for obj in objects]
+
+    def render_missing(self, objects, keys, template, cached):
+        html, missing = [], {}
+        for obj, key in zip(objects, keys, strict=True):
+            fragment = cached.get(key)
+            metrics.cache_result("fragment", fragment is not None)
+            if fragment is None:
+                fragment = template.render({self.context_name: obj})
+                missing[key] = fragment
+            html.append(mark_safe(fragment))
+        return html, missing
+
+    def render(self, objects):
+        """Список HTML фрагментов ``objects`` в том же порядке."""
+        template = get_template(self.template_name)
+        keys = self.keys(objects, template)
+        cache = self.cache()
+        html, missing = self.render_missing(
+            objects, keys, template, cache.get_many(keys)
+        )
+        if missing:
+            cache.set_many(missing, self.timeout())
+        return html
+
+    async def arender(self, objects):
+        """То же, что render(), через async API кэша."""
+        template = get_template(self.template_name)
+        keys = self.keys(objects, template)
+        cache = self.cache()
+        html, missing = self.render_missing(
+            objects, keys, template, await cache.aget_many(keys)
+        )
+        if missing:
+            await cache.aset_many(missing, self.timeout())
+        return html
+
+
+def _resolve(obj, path):
+    for part in path.split("."):
+        if obj is None:
+            return None
+        obj = obj[part] if hasattr(obj, "keys") else getattr(obj, part)
+    return obj
+
+
+def _stamp(value):
+    return value.timestamp() if hasattr(value, "timestamp") else value
+
+
+_DIGESTS = {}
+
+
+def _digest(template):
+    # Кэширующий загрузчик отдаёт один объект шаблона на процесс, так что
+    # хэш исходника считается один раз.
+    source = template.template.source
+    digest = _DIGESTS.get(source)
+    if digest is None:
+        digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+        if len(_DIGESTS) > 64:
+            _DIGESTS.clear()
+        _DIGESTS[source] = digest
+    return digest
+
+
+VACANCY_CARD = Fragment(
+    "vacancy_card",
+    "includes/vacancy_card.html",
+    "vac",
+    stamp_fields=("updated_at", "company.updated_at"),
+)
+COMPANY_TILE = Fragment("company_tile", "includes/company_tile.html", "company")
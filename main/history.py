@@ -0,0 +1,308 @@
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+from simple_history.manager import HistoricalQuerySet
+from simple_history.models import HistoricalRecords
+from simple_history.signals import (
+    post_create_historical_record,
+    pre_create_historical_record,
+)
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Режимы записи истории (настройка HISTORY_RECORDING):
+# immediate — как в simple_history: INSERT сразу при каждом save();
+# batched   — записи копятся в пределах запроса и пишутся одним bulk_create
+#             перед отдачей ответа;
+# deferred  — то же, но bulk_create выполняется после отправки ответа клиенту.
+IMMEDIATE = "immediate"
+BATCHED = "batched"
+DEFERRED = "deferred"
+MODES = (IMMEDIATE, BATCHED, DEFERRED)
+
+BATCH_SIZE = 500
+
+_local = Local()
+
+
+def get_mode():
+    mode = getattr(settings, "HISTORY_RECORDING", IMMEDIATE)
+    if mode not in MODES:
+        raise ImproperlyConfigured(
+            f"HISTORY_RECORDING должен быть одним из: {', '.join(MODES)}"
+        )
+    return mode
+
+
+class Recorder:
+    """Буфер исторических записей одной области batch()."""
+
+    def __init__(self):
+        self.pending = []
+        self.closed = False
+
+    def add(self, record):
+        if self.closed:
+            # Транзакция пережила область batch() — пишем сразу.
+            write([record])
+        else:
+            self.pending.append(record)
+
+    def flush(self):
+        records, self.pending = self.pending, []
+        write(records)
+
+    def close(self):
+        self.flush()
+        self.closed = True
+
+
+def write(records):
+    """
+    Записывает буфер: один bulk_create на каждую пару (историческая модель, БД),
+    затем post_create_historical_record для каждой записи, как в simple_history.
+    """
+    groups = defaultdict(list)
+    for record in records:
+        groups[type(record["history_instance"]), record["using"]].append(record)
+    for (history_model, using), group in groups.items():
+        history_model._default_manager.using(using).bulk_create(
+            [record["history_instance"] for record in group], batch_size=BATCH_SIZE
+        )
+        for record in group:
+            post_create_historical_record.send(sender=history_model, **record)
+
+
+def current_recorder():
+    return getattr(_local, "recorder", None)
+
+
+@contextmanager
+def batch():
+    """
+    Копит исторические записи, созданные внутри блока, и пишет их одним
+    bulk_create на выходе. Вложенные вызовы используют внешний буфер.
+    """
+    if current_recorder() is not None:
+        yield current_recorder()
+        return
+    recorder = _local.recorder = Recorder()
+    try:
+        yield recorder
+    finally:
+        del _local.recorder
+        recorder.close()
+
+
+class RestoringHistoricalQuerySet(HistoricalQuerySet):
+    """
+    Записи истории с восстановленным текстом полей, сжатых командой
+    history_retention (main.retention): админка, diff_against, as_of и
+    instance.history видят полный текст. Запросы values() отдают сырые
+    столбцы.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._restored = False
+
+    def _instanceize(self):
+        if (
+            not self._restored
+            and self._result_cache
+            and isinstance(self._result_cache[0], self.model)
+        ):
+            from . import retention
+
+            retention.restore_many(self._result_cache)
+            self._restored = True
+        super()._instanceize()
+
+
+class BufferedHistoricalRecords(HistoricalRecords):
+    """
+    HistoricalRecords, который внутри batch() не сохраняет запись сразу, а
+    кладёт её в буфер. Изменения внутри transaction.atomic попадают в буфер
+    только после коммита, так что откатанные правки в истории не появляются.
+    """
+
+    def __init__(
+        self, *args, historical_queryset=RestoringHistoricalQuerySet, **kwargs
+    ):
+        super().__init__(*args, historical_queryset=historical_queryset, **kwargs)
+
+    def create_historical_record(self, instance, history_type, using=None):
+        recorder = current_recorder()
+        if recorder is None or self.m2m_fields:
+            return super().create_historical_record(instance, history_type, using)
+
+        using = using if self.use_base_model_db else None
+        record = self.build_historical_record(instance, history_type, using)
+        connection = connections[using or router.db_for_write(instance.__class__)]
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: recorder.add(record), using=connection.alias)
+        else:
+            recorder.add(record)
+
+    def build_historical_record(self, instance, history_type, using):
+        """То же, что create_historical_record, но без сохранения в БД."""
+        history_date = getattr(instance, "_history_date", timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, using
+        )
+        manager = getattr(instance, self.manager_name)
+
+        attrs = {
+            field.attname: getattr(instance, field.attname)
+            for field in self.fields_included(instance)
+        }
+        if getattr(manager.model, "history_relation", None) is not None:
+            attrs["history_relation"] = instance
+
+        history_instance = manager.model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+        record = {
+            "instance": instance,
+            "history_instance": history_instance,
+            "history_date": history_date,
+            "history_user": history_user,
+            "history_change_reason": history_change_reason,
+            "using": using,
+        }
+        pre_create_historical_record.send(sender=manager.model, **record)
+        return record
+
+
+def history_user():
+    request = getattr(HistoricalRecords.context, "request", None)
+    user = getattr(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+class HistoryQuerySet(models.QuerySet):
+    """
+    QuerySet, у которого update() тоже пишет историю: после UPDATE изменённые
+    строки перечитываются и сохраняются одним bulk_history_create.
+    """
+
+    def update(self, **kwargs):
+        if getattr(_local, "skip_update_history", False):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            if not pks:
+                return 0
+            rows = self.model._default_manager.using(self.db).filter(pk__in=pks)
+            updated = rows.update_without_history(**kwargs)
+            self.model.history.bulk_history_create(
+                list(rows),
+                batch_size=BATCH_SIZE,
+                update=True,
+                default_user=history_user(),
+            )
+            # bulk_history_create не шлёт post_create_historical_record.
+            metrics.history_written(self.model, len(pks))
+        return updated
+
+    update.alters_data = True
+
+    def update_without_history(self, **kwargs):
+        return super().update(**kwargs)
+
+    update_without_history.alters_data = True
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        # bulk_update внутри вызывает update(); историю для него пишет
+        # simple_history.utils.bulk_update_with_history (см. main.bulk).
+        _local.skip_update_history = True
+        try:
+            return super().bulk_update(objs, fields, batch_size=batch_size)
+        finally:
+            _local.skip_update_history = False
+
+    bulk_update.alters_data = True
+
+
+class HistoryBatchMiddleware:
+    """
+    Оборачивает запрос в history.batch() в режимах batched и deferred.
+
+    В режиме deferred буфер сбрасывается при закрытии ответа, то есть уже
+    после того, как клиент его получил.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = get_mode()
+        if mode == IMMEDIATE:
+            return self.get_response(request)
+
+        recorder = _local.recorder = Recorder()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            del _local.recorder
+            recorder.close()
+            raise
+        del _local.recorder
+        return self.finish(response, recorder, mode)
+
+    async def __acall__(self, request):
+        mode = get_mode()
+        if mode == IMMEDIATE:
+            return await self.get_response(request)
+
+        recorder = _local.recorder = Recorder()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            del _local.recorder
+            await sync_to_async(recorder.close)()
+            raise
+        del _local.recorder
+        # Запись в БД — в потоке; пустой буфер finish() закроет без запросов.
+        if mode == BATCHED and recorder.pending:
+            await sync_to_async(recorder.close)()
+        return self.finish(response, recorder, mode)
+
+    @staticmethod
+    def finish(response, recorder, mode):
+        if mode == DEFERRED:
+            # Закрыватели ответа выполняются до request_finished, пока
+            # соединение с БД ещё открыто.
+            response._resource_closers.append(lambda: close_logged(recorder))
+        else:
+            recorder.close()
+        return response
+
+
+def close_logged(recorder):
+    try:
+        recorder.close()
+    except Exception:
+        logger.exception("Failed to write deferred history records")
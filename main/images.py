@@ -0,0 +1,302 @@
+import functools
+import io
+import logging
+import posixpath
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import models
+from .storage import file_digest, hashed_name
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = "variants"
+# В имени варианта хэш исходника: по одному URL всегда одно содержимое.
+VARIANT_MAX_AGE = 365 * 24 * 3600
+SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "png": {"format": "PNG", "optimize": True},
+}
+
+# Файлы или варианты объектов ``pks`` модели ``sender`` изменились через
+# update(), без post_save: по нему сбрасываются кэши страниц.
+images_changed = Signal()
+
+
+class ImageSpec:
+    """
+    Поле-изображение и его варианты: имя → наибольшие (ширина, высота).
+    Описание готовых вариантов хранится в JSONField ``variants_field``:
+    ``{"source": имя исходника, "variants": {"sm": {"webp": имя, …}}}``.
+    """
+
+    def __init__(self, field_name, variants_field, sizes, formats=("webp", "png")):
+        self.field_name = field_name
+        self.variants_field = variants_field
+        self.sizes = sizes
+        self.formats = formats
+
+    def is_stale(self, instance):
+        name = getattr(instance, self.field_name).name or ""
+        return name != (getattr(instance, self.variants_field) or {}).get("source", "")
+
+
+SPECS = {
+    # Логотип показывается высотой 40–60px: варианты с запасом для HiDPI.
+    models.Company: (
+        ImageSpec("logo", "logo_variants", {"sm": (240, 120), "md": (480, 240)}),
+    ),
+    models.Event: (
+        ImageSpec(
+            "cover_image", "cover_variants", {"sm": (640, 360), "lg": (1600, 900)}
+        ),
+    ),
+}
+
+
+def variant_name(digest, variant, fmt):
+    return posixpath.join(VARIANTS_DIR, digest[:2], digest, f"{variant}.{fmt}")
+
+
+def build_variants(spec, file):
+    """
+    Создаёт недостающие варианты файла и возвращает значение для
+    ``variants_field``. Имена вариантов зависят только от содержимого, так
+    что одинаковые исходники делят одни и те же файлы.
+    """
+    with file.open("rb"):
+        digest = file_digest(file)
+        names = {
+            variant: {fmt: variant_name(digest, variant, fmt) for fmt in spec.formats}
+            for variant in spec.sizes
+        }
+        missing = {
+            (variant, fmt)
+            for variant, formats in names.items()
+            for fmt, name in formats.items()
+            if not default_storage.exists(name)
+        }
+        if missing:
+            with Image.open(file) as image:
+                for (variant, fmt), content in render_variants(image, spec, missing):
+                    name = names[variant][fmt]
+                    saved = default_storage.save(name, ContentFile(content))
+                    if saved != name:
+                        # Тот же вариант успел сохранить другой воркер.
+                        default_storage.delete(saved)
+    return {"source": file.name, "variants": names}
+
+
+def render_variants(image, spec, missing):
+    """Пары ((вариант, формат), байты) для ``missing``."""
+    largest = max(max(spec.sizes[variant]) for variant, _ in missing)
+    # JPEG декодируется сразу в уменьшенном масштабе, если это возможно.
+    image.draft("RGB", (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+    for variant in sorted({variant for variant, _ in missing}):
+        thumbnail = image.copy()
+        thumbnail.thumbnail(spec.sizes[variant], Image.Resampling.LANCZOS)
+        for fmt in spec.formats:
+            if (variant, fmt) not in missing:
+                continue
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, **SAVE_OPTIONS[fmt])
+            yield (variant, fmt), buffer.getvalue()
+
+
+def _has_alpha(image):
+    return image.mode in ("LA", "PA") or "transparency" in image.info
+
+
+def _touch(model):
+    # updated_at входит в ключи кэша фрагментов и Last-Modified.
+    try:
+        model._meta.get_field("updated_at")
+    except FieldDoesNotExist:
+        return {}
+    return {"updated_at": timezone.now()}
+
+
+def process(model, pk, spec, force=False):
+    """Строит варианты одного объекта; если файл за это время сменился — ничего."""
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or not (force or spec.is_stale(instance)):
+        return False
+    file = getattr(instance, spec.field_name)
+    if not file:
+        value = {}
+    else:
+        try:
+            value = build_variants(spec, file)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning("Не удалось уменьшить %s", file.name, exc_info=True)
+            # Без вариантов шаблоны и API отдают исходник.
+            value = {"source": file.name, "variants": {}}
+    # Служебная запись: _base_manager обходит HistoryQuerySet.update(),
+    # который добавил бы строку истории.
+    updated = model._base_manager.filter(pk=pk, **{spec.field_name: file.name}).update(
+        **{spec.variants_field: value}, **_touch(model)
+    )
+    if updated:
+        images_changed.send(sender=model, pks=[pk])
+    return bool(updated)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _submit(*args):
+    if not getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+        _run(*args)
+        return
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Пул создаётся в воркере, после fork: потоки fork не переживают.
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="images")
+    _executor.submit(_run_in_thread, *args)
+
+
+def _run(*args):
+    try:
+        process(*args)
+    except Exception:
+        logger.exception("Ошибка обработки изображения")
+
+
+def _run_in_thread(*args):
+    try:
+        _run(*args)
+    finally:
+        connections.close_all()
+
+
+def schedule(instance):
+    """
+    После коммита ставит в фоновую очередь поля ``instance``, у которых
+    сменился файл. Старые варианты сразу сбрасываются: до пересборки
+    шаблоны и API отдают исходник.
+    """
+    model = type(instance)
+    for spec in SPECS.get(model, ()):
+        if not spec.is_stale(instance):
+            continue
+        setattr(instance, spec.variants_field, {})
+        model._base_manager.filter(pk=instance.pk).update(**{spec.variants_field: {}})
+        transaction.on_commit(functools.partial(_submit, model, instance.pk, spec))
+
+
+def variant_url(file, value, variant, fmt):
+    """URL варианта или None, если для текущего файла его ещё нет."""
+    if not file or not value or value.get("source") != file.name:
+        return None
+    name = value.get("variants", {}).get(variant, {}).get(fmt)
+    return default_storage.url(name) if name else None
+
+
+def variant_urls(value, request=None):
+    """``{"sm": {"webp": URL, "png": URL}, …}`` по значению ``variants_field``."""
+    urls = {}
+    for variant, names in (value or {}).get("variants", {}).items():
+        urls[variant] = {}
+        for fmt, name in names.items():
+            url = default_storage.url(name)
+            urls[variant][fmt] = (
+                request.build_absolute_uri(url) if request is not None else url
+            )
+    return urls
+
+
+def _tracked_models(model):
+    history = getattr(model, "history", None)
+    return [model] if history is None else [model, history.model]
+
+
+def dedupe(model, spec, dry_run=False):
+    """
+    Сводит одинаковые по содержимому файлы поля к одному с именем по хэшу
+    (как при загрузке через main.storage.ContentHashStorage): ссылки в
+    объектах и их истории переводятся на него, копии удаляются. Файлы, на
+    которые никто не ссылается (например, заглушка not_found.png), не
+    трогаются. Возвращает (число объектов, число удалённых файлов).
+    """
+    field = model._meta.get_field(spec.field_name)
+    storage = field.storage
+    tracked = _tracked_models(model)
+
+    referenced = set()
+    for tracked_model in tracked:
+        referenced.update(
+            tracked_model._default_manager.exclude(**{spec.field_name: ""})
+            .exclude(**{f"{spec.field_name}__isnull": True})
+            .values_list(spec.field_name, flat=True)
+            .distinct()
+        )
+    directory = str(field.upload_to).rstrip("/")
+    on_disk = set()
+    if storage.exists(directory):
+        on_disk = {
+            posixpath.join(directory, name) for name in storage.listdir(directory)[1]
+        }
+
+    groups = defaultdict(set)
+    for name in referenced | on_disk:
+        if not storage.exists(name):
+            continue
+        with storage.open(name, "rb") as content:
+            groups[file_digest(content)].add(name)
+
+    changed, removed = set(), 0
+    for digest, names in groups.items():
+        if not names & referenced:
+            continue
+        canonical = hashed_name(min(names & referenced), digest)
+        if canonical not in names and not dry_run:
+            with storage.open(min(names), "rb") as content:
+                canonical = storage.save(canonical, content)
+        for name in sorted(names - {canonical}):
+            if name in referenced:
+                live = model._default_manager.filter(**{spec.field_name: name})
+                changed.update(live.values_list("pk", flat=True))
+                if not dry_run:
+                    # Содержимое файла не меняется: история переводится на
+                    # новое имя ниже, а не пополняется.
+                    model._base_manager.filter(**{spec.field_name: name}).update(
+                        **{spec.field_name: canonical}, **_touch(model)
+                    )
+                    for tracked_model in tracked[1:]:
+                        tracked_model._default_manager.filter(
+                            **{spec.field_name: name}
+                        ).update(**{spec.field_name: canonical})
+            if not dry_run:
+                storage.delete(name)
+            removed += 1
+    if changed and not dry_run:
+        images_changed.send(sender=model, pks=sorted(changed))
+    return len(changed), removed
+
+
+def rebuild(model, spec, force=False):
+    """Синхронно строит варианты всех объектов модели; возвращает их число."""
+    queryset = (
+        model._default_manager.exclude(**{spec.field_name: ""})
+        .exclude(**{f"{spec.field_name}__isnull": True})
+        .order_by("pk")
+    )
+    built = 0
+    for pk in queryset.values_list("pk", flat=True):
+        built += process(model, pk, spec, force=force)
+    return built
@@ -0,0 +1,125 @@
+import logging
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import exports, metrics, models
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = timedelta(hours=1)
+
+
+def enqueue_export(company=None, export_format="xlsx", only_active=True, user=None):
+    return models.ExportJob.objects.create(
+        company=company,
+        export_format=export_format,
+        only_active=only_active,
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def claim_next_job():
+    """
+    Забирает самую старую задачу из очереди и переводит её в «running».
+
+    Очередью служит сама таблица ExportJob: условный UPDATE по статусу
+    гарантирует, что задачу получит только один воркер.
+    """
+    queued = models.ExportJob.objects.filter(status="queued").order_by(
+        "created_at", "id"
+    )
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        job_id = queued.values_list("id", flat=True).first()
+        if job_id is None:
+            return None
+        claimed = models.ExportJob.objects.filter(id=job_id, status="queued").update(
+            status="running",
+            started_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+    return job_id if claimed else None
+
+
+def requeue_stale_jobs(older_than):
+    """Возвращает в очередь задачи, воркер которых умер посреди выгрузки."""
+    deadline = timezone.now() - older_than
+    return models.ExportJob.objects.filter(
+        status="running", started_at__lt=deadline
+    ).update(status="queued", started_at=None)
+
+
+def mark_failed(job_id, error):
+    """Помечает неудавшейся задачу, которая так и осталась в «running»."""
+    return models.ExportJob.objects.filter(id=job_id, status="running").update(
+        status="failed", error=error, finished_at=timezone.now()
+    )
+
+
+def export_queryset(job):
+    queryset = models.Vacancy.objects.all()
+    if job.company_id is not None:
+        queryset = queryset.filter(company_id=job.company_id)
+    if job.only_active:
+        queryset = queryset.filter(is_active=True)
+    return queryset
+
+
+def run_job(job_id):
+    """Выполняет одну задачу; вызывается в процессе пула воркера."""
+    close_old_connections()
+    started = time.perf_counter()
+    try:
+        job = models.ExportJob.objects.get(id=job_id)
+    except models.ExportJob.DoesNotExist:
+        # Задачу удалили уже после того, как воркер её забрал.
+        logger.warning("Export job %s no longer exists", job_id)
+        return job_id, "missing"
+    try:
+        row_count = 0
+
+        def counted(rows):
+            nonlocal row_count
+            for row in rows:
+                row_count += 1
+                yield row
+
+        rows = counted(exports.iter_rows(export_queryset(job)))
+        _, extension = exports.EXPORT_FORMATS[job.export_format]
+        name = f"vacancies_{job.company_id or 'all'}_{job.id}.{extension}"
+        # В транзакции серверный курсор Postgres (.iterator()) отдаёт строки
+        # по мере чтения; вне её курсор WITH HOLD сначала материализует всю
+        # выборку на сервере.
+        with tempfile.TemporaryFile() as fileobj, transaction.atomic():
+            exports.write_export(rows, job.export_format, fileobj)
+            fileobj.seek(0)
+            job.file.save(name, File(fileobj), save=False)
+
+        job.status = "done"
+        job.row_count = max(row_count - 1, 0)  # без строки заголовков
+        job.error = ""
+    except Exception as exc:
+        # Трассировка — только в лог: поле error отдаётся клиенту через API.
+        logger.exception("Export job %s failed", job_id)
+        job.status = "failed"
+        job.error = f"{type(exc).__name__}: {exc}"
+    job.finished_at = timezone.now()
+    try:
+        job.save(update_fields=["status", "file", "row_count", "error", "finished_at"])
+    except DatabaseError:
+        # Например, «database is locked» на SQLite: статус допишет run_export_worker.
+        logger.exception("Export job %s: failed to save the result", job_id)
+        job.status = "failed"
+    metrics.EXPORT_JOB_DURATION.observe(
+        time.perf_counter() - started, format=job.export_format, status=job.status
+    )
+    # Процесс пула не обслуживает HTTP-запросы, поэтому снимок сохраняем сразу.
+    metrics.flush(force=True)
+    return job_id, job.status
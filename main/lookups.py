@@ -0,0 +1,114 @@
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metrics, models
+
+
+class ChoiceTable:
+    """Неизменяемая таблица вариантов выбора с быстрыми проверками."""
+
+    __slots__ = ("choices", "values", "labels", "_valid")
+
+    def __init__(self, choices):
+        self.choices = tuple(choices)
+        self.values = tuple(value for value, _ in self.choices)
+        self.labels = dict(self.choices)
+        self._valid = frozenset(self.values)
+
+    def __contains__(self, value):
+        return value in self._valid
+
+    def __iter__(self):
+        return iter(self.choices)
+
+    def label(self, value):
+        return self.labels.get(value, value)
+
+
+EMPLOYMENT_TYPES = ChoiceTable(models.EMPLOYMENT_TYPE_CHOICES)
+EXPERIENCE = ChoiceTable(models.EXPERIENCE_CHOICES)
+SCHEDULES = ChoiceTable(models.SCHEDULE_CHOICES)
+
+
+class FieldOfStudyCache:
+    """
+    Кэш направлений подготовки в памяти процесса.
+
+    Сбрасывается сигналами при изменении FieldOfStudy; ``timeout`` нужен,
+    чтобы изменения из других воркеров тоже доходили без перезапуска. Id,
+    которого нет в кэше, проверяется одним запросом к БД: направление могло
+    появиться в другом воркере.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._fields = ()
+        self._by_id = {}
+
+    def _get_timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, "LOOKUP_CACHE_TIMEOUT", 300)
+
+    def _is_fresh(self, loaded_at):
+        return (
+            loaded_at is not None and time.monotonic() - loaded_at < self._get_timeout()
+        )
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if self._is_fresh(loaded_at):
+            metrics.cache_result("fields_of_study", True)
+            return
+        metrics.cache_result("fields_of_study", False)
+        with self._lock:
+            if self._loaded_at is not loaded_at:
+                return
+            fields = tuple(models.FieldOfStudy.objects.order_by("id"))
+            self._fields = fields
+            self._by_id = {field.id: field for field in fields}
+            self._loaded_at = time.monotonic()
+
+    def all(self):
+        self._ensure_loaded()
+        return self._fields
+
+    def _cached(self, field_id):
+        # (id, направление из кэша); id None — значение не число.
+        try:
+            field_id = int(field_id)
+        except (TypeError, ValueError):
+            return None, None
+        return field_id, self._by_id.get(field_id)
+
+    def get(self, field_id):
+        """Возвращает направление по id (строке или числу) или None."""
+        self._ensure_loaded()
+        field_id, field = self._cached(field_id)
+        if field is None and field_id is not None:
+            field = models.FieldOfStudy.objects.filter(pk=field_id).first()
+            if field is not None:
+                # Кэш устарел: перечитать весь справочник при следующем обращении.
+                self.invalidate()
+        return field
+
+    async def aget(self, field_id):
+        """get() для async-кода: запросы к БД уходят в поток."""
+        if self._is_fresh(self._loaded_at):
+            field_id, field = self._cached(field_id)
+            if field is not None or field_id is None:
+                metrics.cache_result("fields_of_study", True)
+                return field
+        return await sync_to_async(self.get)(field_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+fields_of_study = FieldOfStudyCache()
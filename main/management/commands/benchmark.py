@@ -0,0 +1,228 @@
+import functools
+import platform
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment
+from django.utils import timezone
+
+from main import benchmarking
+from main.models import Application, Company, User, Vacancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон HTML-страниц, выгрузок и API: засевает набор данных "
+        "фиксированного размера, меряет p50/p95/p99, пропускную способность, "
+        "число запросов и пик памяти через тестовый клиент, (с --http) через "
+        "локальный gunicorn и (с --asgi) через uvicorn, пишет JSON и сравнивает "
+        "с эталоном. База задаётся переменной DATABASE_NAME и будет перезаписана"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vacancies", type=int, default=5000)
+        parser.add_argument("--companies", type=int, default=500)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--applications", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--skip-seed",
+            action="store_true",
+            help="Не пересоздавать данные (база уже засеяна тем же набором)",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            help="Запустить только указанные сценарии (можно повторять)",
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--http", action="store_true", help="Дополнительно прогнать через gunicorn"
+        )
+        parser.add_argument(
+            "--worker-class",
+            action="append",
+            choices=sorted(benchmarking.WORKER_CLASSES),
+            help="Воркеры gunicorn для --http (можно повторять, по умолчанию sync)",
+        )
+        parser.add_argument("--threads", type=int, help="Потоков на воркер gthread")
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Дополнительно прогнать через uvicorn (careercenter.asgi_server)",
+        )
+        parser.add_argument(
+            "--slow-clients",
+            type=int,
+            default=0,
+            help="Держать столько медленных соединений во время HTTP-прогонов",
+        )
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Не отключать кэш ответов и фасетов",
+        )
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Допустимое ухудшение относительно эталона (0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        default_db = settings.DATABASE_DEFAULT_NAMES.get(settings.DATABASE_ENGINE)
+        if (
+            not options["skip_seed"]
+            and str(connection.settings_dict["NAME"]) == default_db
+        ):
+            raise CommandError(
+                "Бенчмарк перезаписывает данные. Укажите отдельную базу, например "
+                "DATABASE_NAME=/tmp/benchmark.sqlite3 python manage.py benchmark "
+                "(для Postgres — DATABASE_NAME=careercenter_benchmark)"
+            )
+        scenarios = [
+            scenario
+            for scenario in benchmarking.SCENARIOS
+            if not options["scenario"] or scenario.name in options["scenario"]
+        ]
+        if not scenarios:
+            raise CommandError("Нет сценариев с такими именами")
+
+        if not options["skip_seed"]:
+            call_command("migrate", verbosity=0)
+            call_command(
+                "seed",
+                vacancies=options["vacancies"],
+                companies=options["companies"],
+                users=options["users"],
+                applications=options["applications"],
+                seed=options["seed"],
+                stdout=self.stdout,
+            )
+        objects = {
+            "vacancy": Vacancy.objects.order_by("id").values_list("id", flat=True)[0],
+            "company": Company.objects.order_by("id").values_list("id", flat=True)[0],
+        }
+
+        caches_off = (
+            {}
+            if options["with_cache"]
+            else {
+                "RESPONSE_CACHE_TIMEOUT": 0,
+                "FACETS_CACHE_TIMEOUT": 0,
+            }
+        )
+        results = {"client": {}}
+        setup_test_environment()
+        with override_settings(**caches_off):
+            for scenario in scenarios:
+                metrics = benchmarking.run_client(
+                    scenario, objects, options["iterations"], options["warmup"]
+                )
+                results["client"][scenario.name] = metrics
+                self.report("client", scenario.name, metrics)
+
+        servers = []
+        if options["http"]:
+            for worker_class in options["worker_class"] or ["sync"]:
+                mode = "http" if worker_class == "sync" else f"http-{worker_class}"
+                servers.append(
+                    (
+                        mode,
+                        functools.partial(
+                            benchmarking.Gunicorn,
+                            worker_class=worker_class,
+                            threads=options["threads"],
+                        ),
+                    )
+                )
+        if options["asgi"]:
+            servers.append(("asgi", benchmarking.Uvicorn))
+        env = {
+            "DATABASE_NAME": str(connection.settings_dict["NAME"]),
+            "ALLOWED_HOSTS": "127.0.0.1",
+            "DEBUG": "False",
+            **{name: str(value) for name, value in caches_off.items()},
+        }
+        for mode, server_class in servers:
+            results[mode] = {}
+            with (
+                server_class(workers=options["workers"], env=env) as server,
+                benchmarking.SlowClients(server.port, options["slow_clients"]),
+            ):
+                for scenario in scenarios:
+                    metrics = benchmarking.run_http(
+                        server.base_url,
+                        scenario,
+                        objects,
+                        options["requests"],
+                        options["concurrency"],
+                        options["warmup"],
+                    )
+                    results[mode][scenario.name] = metrics
+                    self.report(mode, scenario.name, metrics)
+                results[f"{mode}_peak_memory_kb"] = server.peak_memory_kb()
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "dataset": {
+                "vacancies": Vacancy.objects.count(),
+                "companies": Company.objects.count(),
+                "users": User.objects.count(),
+                "applications": Application.objects.count(),
+                "seed": None if options["skip_seed"] else options["seed"],
+            },
+            "slow_clients": options["slow_clients"],
+            "results": results,
+        }
+        if options["baseline"]:
+            baseline = benchmarking.load(options["baseline"])
+            report["regressions"] = benchmarking.compare(
+                {
+                    mode: scenarios
+                    for mode, scenarios in results.items()
+                    if isinstance(scenarios, dict)
+                },
+                baseline["results"],
+                options["tolerance"],
+            )
+        benchmarking.dump(report, options["output"])
+        self.stdout.write(f"Результаты: {Path(options['output']).resolve()}")
+
+        regressions = report.get("regressions")
+        if regressions:
+            for item in regressions:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"РЕГРЕССИЯ {item['mode']}/{item['scenario']} "
+                        f"{item['metric']}: "
+                        f"{item['baseline']} → {item['current']} "
+                        f"(+{item['change']:.0%})"
+                    )
+                )
+            raise CommandError(f"Регрессий относительно эталона: {len(regressions)}")
+
+    def report(self, mode, name, metrics):
+        extra = ""
+        if "queries" in metrics:
+            extra = (
+                f", запросов {metrics['queries']}, "
+                f"память {metrics['peak_memory_kb']} КБ"
+            )
+        self.stdout.write(
+            f"{mode:6} {name:26} p50 {metrics['p50_ms']} мс, "
+            f"p95 {metrics['p95_ms']} мс, "
+            f"p99 {metrics['p99_ms']} мс, {metrics['throughput_rps']} rps, "
+            f"ошибок {metrics['errors']}{extra}"
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from main import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит уменьшенные копии логотипов компаний и обложек мероприятий "
+        "(WebP и PNG) для объектов, у которых их ещё нет или сменился файл. "
+        "С --dedupe сначала объединяет одинаковые по содержимому файлы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dedupe",
+            action="store_true",
+            help="Свести копии файлов к одному файлу с именем по хэшу",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересобрать варианты всех объектов",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать копии, ничего не изменяя",
+        )
+
+    def handle(self, *args, **options):
+        for model, specs in images.SPECS.items():
+            for spec in specs:
+                name = f"{model._meta.label}.{spec.field_name}"
+                if options["dedupe"] or options["dry_run"]:
+                    changed, removed = images.dedupe(
+                        model, spec, dry_run=options["dry_run"]
+                    )
+                    self.stdout.write(
+                        f"{name}: объектов с копиями {changed}, "
+                        f"удалено файлов {removed}"
+                    )
+                if options["dry_run"]:
+                    continue
+                built = images.rebuild(model, spec, force=options["force"])
+                self.stdout.write(f"{name}: обработано объектов {built}")
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+
+from main import lookups
+from main.models import Company, Vacancy
+from main.querybudget import (
+    AUTH_QUERIES,
+    BUDGETS,
+    UNCACHED,
+    QueryBudgetExceeded,
+    query_budget,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Проходит по основным страницам и API и завершается с ошибкой, "
+        "если какая-то из них выполняет больше SQL-запросов, чем допустимо"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--show-queries",
+            action="store_true",
+            help="Печатать SQL каждой страницы",
+        )
+
+    def handle(self, *args, **options):
+        vacancy = Vacancy.objects.order_by("id").first()
+        company = Company.objects.order_by("id").first()
+        admin = get_user_model().objects.filter(is_superuser=True).first()
+        if vacancy is None or company is None or admin is None:
+            raise CommandError(
+                "Нужны хотя бы одна вакансия, компания и суперпользователь "
+                "(см. manage.py seed и createsuperuser)"
+            )
+
+        setup_test_environment()
+        client = Client()
+        client.force_login(admin)
+        failures = []
+        with override_settings(**UNCACHED):
+            for name, url, limit in BUDGETS:
+                url = url.format(vacancy=vacancy.id, company=company.id)
+                limit += AUTH_QUERIES
+                lookups.fields_of_study.invalidate()
+                try:
+                    with query_budget(limit) as queries:
+                        response = client.get(url)
+                except QueryBudgetExceeded as exc:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"FAIL  {name}: {exc}"))
+                    continue
+                if response.status_code != 200:
+                    failures.append(name)
+                    self.stdout.write(
+                        self.style.ERROR(f"FAIL  {name}: HTTP {response.status_code}")
+                    )
+                    continue
+                self.stdout.write(
+                    self.style.SUCCESS(f"OK    {name}: {len(queries)}/{limit}")
+                )
+                if options["show_queries"]:
+                    for query in queries.captured_queries:
+                        self.stdout.write(f"      {query['sql']}")
+
+        if failures:
+            raise CommandError("Превышен бюджет запросов: " + ", ".join(failures))
@@ -0,0 +1,85 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+from main.models import Vacancy
+
+# Признаки полного прохода по таблице в выводе EXPLAIN.
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (TABLE )?(?P<table>\w+)(?! USING)(\s|$)"),
+    "postgresql": re.compile(r"\bSeq Scan on (?P<table>\w+)"),
+}
+
+
+def canonical_queries():
+    active = Vacancy.objects.filter(is_active=True)
+    ordering = ("-created_at", "-id")
+    return {
+        "Список активных вакансий": active.order_by(*ordering)[:31],
+        "Фильтр по направлению": active.filter(field_id=1).order_by(*ordering)[:31],
+        "Фильтр по типу занятости": active.filter(employment_type="full").order_by(
+            *ordering
+        )[:31],
+        "Фильтр по опыту": active.filter(experience="1-3").order_by(*ordering)[:31],
+        "Фильтр по городу": active.alias(city_lower=Lower("city"))
+        .filter(city_lower=Lower(Value("Москва")))
+        .order_by(*ordering)[:10],
+        "Сортировка по salary_min": active.order_by("salary_min")[:10],
+        "Сортировка по salary_max": active.order_by("-salary_max")[:10],
+        "API: все вакансии": Vacancy.objects.order_by("-created_at")[:10],
+        "Экспорт вакансий компании": active.filter(company_id=1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает EXPLAIN для типовых запросов к вакансиям и завершается "
+        "с ошибкой, если какой-то из них читает таблицу целиком"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Печатать план каждого запроса",
+        )
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"EXPLAIN не поддерживается для {connection.vendor}")
+
+        failures = []
+        for name, queryset in canonical_queries().items():
+            plan = self.explain(queryset)
+            full_scans = [
+                match.group("table")
+                for match in pattern.finditer(plan)
+                if match.group("table") == Vacancy._meta.db_table
+            ]
+            if full_scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {name}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK         {name}"))
+            if full_scans or options["verbose_plans"]:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(
+                "Полный проход по таблице в запросах: " + ", ".join(failures)
+            )
+
+    @staticmethod
+    def explain(queryset):
+        if connection.vendor != "postgresql":
+            return queryset.explain()
+        # На маленьких таблицах Postgres честно выбирает Seq Scan, поэтому
+        # проверяем, что индексный план вообще существует.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
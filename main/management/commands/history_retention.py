@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Применяет политику хранения истории (HISTORY_RETENTION): переносит "
+        "старые записи в архивные файлы и сжимает текстовые поля оставшихся. "
+        "Предназначена для запуска по расписанию (cron, systemd timer)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compact-after",
+            type=int,
+            metavar="DAYS",
+            help="Сжимать записи старше DAYS дней (0 — не сжимать)",
+        )
+        parser.add_argument(
+            "--archive-after",
+            type=int,
+            metavar="DAYS",
+            help="Архивировать записи старше DAYS дней (0 — не архивировать)",
+        )
+        parser.add_argument(
+            "--no-archive-files",
+            action="store_true",
+            help="Удалять старые записи, не сохраняя их в файлы",
+        )
+        parser.add_argument("--batch-size", type=int, default=retention.BATCH_SIZE)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать, ничего не изменяя",
+        )
+
+    def handle(self, *args, **options):
+        policy = retention.get_policy()
+        compact_after = options["compact_after"]
+        if compact_after is None:
+            compact_after = policy["compact_after_days"]
+        archive_after = options["archive_after"]
+        if archive_after is None:
+            archive_after = policy["archive_after_days"]
+        archive_dir = None if options["no_archive_files"] else policy["archive_dir"]
+
+        now = timezone.now()
+        for history_model in retention.history_models():
+            name = history_model._meta.label
+            if archive_after:
+                stats = retention.expire(
+                    history_model,
+                    now - timedelta(days=archive_after),
+                    archive_dir=archive_dir,
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+                verb = "удалено" if archive_dir is None else "в архиве"
+                self.stdout.write(f"{name}: {verb} {stats.rows}")
+            if compact_after:
+                stats = retention.compact(
+                    history_model,
+                    now - timedelta(days=compact_after),
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+                self.stdout.write(
+                    f"{name}: сжато записей {stats.rows}, полей {stats.fields}, "
+                    f"освобождено ~{stats.bytes_saved} символов"
+                )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main import search
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс вакансий"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        search.get_backend().rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен"))
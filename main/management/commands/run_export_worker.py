@@ -0,0 +1,100 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from main import jobs, workers
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет фоновые задачи выгрузки вакансий. Очередь — таблица "
+        "ExportJob, задачи разбираются пулом процессов, файлы сохраняются "
+        "в MEDIA_ROOT/exports/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=max(1, (os.cpu_count() or 2) // 2),
+            help="Число процессов пула",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Разобрать текущую очередь и завершиться",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Пауза между опросами пустой очереди, с",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=int(jobs.STALE_AFTER.total_seconds() // 60),
+            help="Через сколько минут зависшая задача возвращается в очередь",
+        )
+
+    def handle(self, *args, **options):
+        processes = options["processes"]
+        stale_after = timedelta(minutes=options["stale_after"])
+        requeued = jobs.requeue_stale_jobs(stale_after)
+        if requeued:
+            self.stdout.write(f"Возвращено в очередь зависших задач: {requeued}")
+
+        context = multiprocessing.get_context("spawn")
+        running = {}
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=workers.init_process,
+        ) as pool:
+            while True:
+                while len(running) < processes:
+                    job_id = jobs.claim_next_job()
+                    if job_id is None:
+                        break
+                    self.stdout.write(f"Задача #{job_id}: старт")
+                    running[pool.submit(workers.run_export_job, job_id)] = job_id
+
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                done, _ = wait(
+                    running,
+                    timeout=options["poll_interval"],
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    self.finish(running.pop(future), future)
+
+    def finish(self, job_id, future):
+        try:
+            _, status = future.result()
+            error = "Не удалось сохранить результат выгрузки"
+        except Exception as exc:
+            # Ошибка одной задачи (или падение процесса пула) не должна
+            # останавливать разбор очереди.
+            logger.exception("Export job %s crashed", job_id)
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+        if status == "failed":
+            try:
+                # Если run_job не смог записать статус, задача ещё «running».
+                jobs.mark_failed(job_id, error)
+            except DatabaseError:
+                logger.exception("Export job %s: failed to mark as failed", job_id)
+        style = self.style.SUCCESS if status == "done" else self.style.ERROR
+        self.stdout.write(style(f"Задача #{job_id}: {status}"))
@@ -1,16 +1,63 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from main.models import Company, FieldOfStudy, Vacancy
+from main import caching, lookups, search, seeding
+from main.models import (
+    APPLICATION_STATUS_CHOICES,
+    Application,
+    Company,
+    ExportJob,
+    FieldOfStudy,
+    HistoryDelta,
+    Vacancy,
+)
 
 User = get_user_model()
 
 
 class Command(BaseCommand):
-    help = "Заполняет базу данных тестовыми данными"
+    help = (
+        "Заполняет базу данных тестовыми данными. Без параметров создаёт "
+        "небольшой демонстрационный набор; с --vacancies/--companies/--users/"
+        "--applications генерирует большой воспроизводимый набор для нагрузочных "
+        "тестов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=0)
+        parser.add_argument("--users", type=int, default=0)
+        parser.add_argument("--vacancies", type=int, default=0)
+        parser.add_argument("--applications", type=int, default=0)
+        parser.add_argument(
+            "--seed", type=int, default=42, help="Зерно генератора (по умолчанию 42)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Строк в одной пачке генерации и bulk_create",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Процессов для генерации данных (вставку выполняет основной)",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
+        volumes = ("companies", "users", "vacancies", "applications")
+        if any(options[name] for name in volumes):
+            self.seed_bulk(options)
+        else:
+            self.seed_demo()
+
+    @transaction.atomic
+    def seed_demo(self):
         self.stdout.write("Удаление старых данных...")
         models = [Vacancy, User, Company, FieldOfStudy]
         for model in models:
@@ -91,3 +138,94 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS("База данных успешно заполнена тестовыми данными!")
         )
+
+    def seed_bulk(self, options):
+        companies = options["companies"] or max(1, options["vacancies"] // 10)
+        users = options["users"] or max(1, options["applications"] // 10)
+        vacancies = options["vacancies"]
+        applications = options["applications"]
+        if applications and not vacancies:
+            raise CommandError("Для откликов нужны вакансии: укажите --vacancies")
+        if applications > users * vacancies:
+            raise CommandError(
+                f"Уникальных пар (пользователь, вакансия) только {users * vacancies}"
+            )
+        started = time.monotonic()
+
+        self.stdout.write("Удаление старых данных...")
+        with transaction.atomic():
+            # Без каскадов и сигналов: построчное удаление со сбором связей и
+            # записью истории на таких объёмах занимает минуты.
+            for model in (Application, Vacancy, Company):
+                model.history.all()._raw_delete(model.history.db)
+            for model in (HistoryDelta, Application, ExportJob, Vacancy):
+                model.objects.all()._raw_delete(model.objects.db)
+            User.objects.all().delete()
+            for model in (Company, FieldOfStudy):
+                model.objects.all()._raw_delete(model.objects.db)
+            search.get_backend().clear()
+
+        FieldOfStudy.objects.bulk_create(
+            FieldOfStudy(name=name) for name in seeding.FIELDS_OF_STUDY
+        )
+        context = {
+            "field_ids": self.ids(FieldOfStudy),
+            "employment_types": lookups.EMPLOYMENT_TYPES.values,
+            "experience": lookups.EXPERIENCE.values,
+            "schedules": lookups.SCHEDULES.values,
+            "application_statuses": [value for value, _ in APPLICATION_STATUS_CHOICES],
+            # Один хэш на всех: хэшер с солью вызывается один раз, а не на
+            # каждого пользователя. Пароль у всех — password123.
+            "password": make_password("password123"),
+        }
+
+        self.insert(Company, "companies", companies, context, options)
+        context["company_ids"] = self.ids(Company)
+        self.insert(User, "users", users, context, options)
+        context["user_ids"] = self.ids(User)
+        self.insert(Vacancy, "vacancies", vacancies, context, options)
+        context["vacancy_ids"] = self.ids(Vacancy)
+        self.insert(Application, "applications", applications, context, options)
+
+        self.stdout.write("Перестроение поискового индекса...")
+        search.get_backend().rebuild(batch_size=options["batch_size"])
+        lookups.fields_of_study.invalidate()
+        for namespace in (caching.VACANCIES, caching.COMPANIES):
+            caching.bump_version(namespace)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово за {time.monotonic() - started:.1f} с: компаний {companies}, "
+                f"пользователей {users}, вакансий {vacancies}, откликов {applications}"
+            )
+        )
+
+    def insert(self, model, kind, total, context, options):
+        if not total:
+            return
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {total}...")
+        batch_size = options["batch_size"]
+        tasks = seeding.chunks(kind, total, batch_size, options["seed"])
+        with transaction.atomic():
+            if options["processes"] > 1:
+                with ProcessPoolExecutor(
+                    max_workers=options["processes"],
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=seeding.init_worker,
+                    initargs=(context,),
+                ) as pool:
+                    self.create(model, pool.map(seeding.generate, tasks), batch_size)
+            else:
+                seeding.init_worker(context)
+                self.create(model, map(seeding.generate, tasks), batch_size)
+
+    @staticmethod
+    def create(model, chunks, batch_size):
+        for rows in chunks:
+            model.objects.bulk_create(
+                [model(**row) for row in rows], batch_size=batch_size
+            )
+
+    @staticmethod
+    def ids(model):
+        return list(model.objects.order_by("pk").values_list("pk", flat=True))
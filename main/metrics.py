@@ -0,0 +1,435 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# Метрики в стиле Prometheus без внешних зависимостей. Каждый процесс
+# (воркер gunicorn, процесс пула выгрузок) копит значения в памяти и
+# периодически сбрасывает снимок в METRICS_DIR/<pid>.json; /metrics
+# суммирует снимки всех процессов. Каталог стоит очищать при старте сервера
+# (см. clear_directory), иначе в суммы попадут значения прошлых запусков.
+# Счётчики и гистограммы завершившихся процессов переносятся в archive.json
+# (mark_process_dead), их gauge-значения отбрасываются.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_histograms = {}
+_collectors = []
+_last_flush = 0.0
+
+ARCHIVE = "archive.json"
+
+METRICS = {}
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        METRICS[name] = self
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = (self.name, _label_key(labels))
+        with _lock:
+            _counters[key] += amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = (self.name, _label_key(labels))
+        with _lock:
+            _gauges[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def observe(self, value, **labels):
+        key = (self.name, _label_key(labels))
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            state = _histograms.get(key)
+            if state is None:
+                state = _histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса по имени URL",
+    LATENCY_BUCKETS,
+)
+REQUESTS = Counter("http_requests_total", "Запросы по имени URL и статусу")
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "SQL-запросов на один HTTP-запрос", QUERY_COUNT_BUCKETS
+)
+DB_DURATION = Histogram(
+    "db_duration_seconds", "Суммарное время SQL за HTTP-запрос", LATENCY_BUCKETS
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "Обращения к кэшам: hit/miss")
+EXPORT_JOB_DURATION = Histogram(
+    "export_job_duration_seconds", "Длительность фоновых выгрузок", JOB_BUCKETS
+)
+HISTORY_RECORDS = Counter(
+    "history_records_written_total", "Записано исторических записей"
+)
+WORKER_REQUESTS = Gauge(
+    "gunicorn_worker_requests", "Запросов обработано воркером с момента запуска"
+)
+WORKER_MAX_REQUESTS = Gauge(
+    "gunicorn_worker_max_requests", "Порог перезапуска воркера (max_requests + jitter)"
+)
+WORKER_RSS = Gauge("gunicorn_worker_rss_bytes", "Резидентная память воркера")
+WORKER_STARTED = Gauge(
+    "gunicorn_worker_start_time_seconds", "Время запуска воркера (unix time)"
+)
+WORKER_EXITS = Counter(
+    "gunicorn_worker_exits_total",
+    "Завершения воркеров: exit — все, timeout — из них по таймауту",
+)
+
+
+def local_total(counter):
+    """Сумма счётчика по всем меткам в текущем процессе."""
+    with _lock:
+        return sum(
+            value for (name, _), value in _counters.items() if name == counter.name
+        )
+
+
+def cache_result(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def history_written(model, count=1):
+    HISTORY_RECORDS.inc(count, model=model._meta.label)
+
+
+def reset():
+    """
+    Обнуляет значения процесса. Вызывается в воркере сразу после fork, чтобы
+    он не унаследовал счётчики мастера и они не посчитались дважды.
+    """
+    global _last_flush
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+    _collectors.clear()
+    _last_flush = 0.0
+
+
+def register_collector(collector):
+    """Функция, обновляющая gauge-значения процесса перед каждым снимком."""
+    _collectors.append(collector)
+
+
+def get_directory():
+    return getattr(settings, "METRICS_DIR", None)
+
+
+def snapshot():
+    for collector in _collectors:
+        collector()
+    with _lock:
+        return {
+            "counters": [
+                [name, labels, value] for (name, labels), value in _counters.items()
+            ],
+            "gauges": [
+                [name, labels, value] for (name, labels), value in _gauges.items()
+            ],
+            "histograms": [
+                [name, labels, list(state[0]), state[1], state[2]]
+                for (name, labels), state in _histograms.items()
+            ],
+        }
+
+
+def flush(force=False):
+    """
+    Сохраняет снимок метрик процесса. Без ``force`` — не чаще, чем раз в
+    METRICS_FLUSH_INTERVAL секунд.
+    """
+    global _last_flush
+    directory = get_directory()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < getattr(settings, "METRICS_FLUSH_INTERVAL", 5):
+        return
+    _last_flush = now
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    _write(directory / f"{os.getpid()}.json", snapshot())
+
+
+def _write(path, data):
+    # Запись через временный файл: читатель не увидит наполовину записанный снимок.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as fileobj:
+        json.dump(data, fileobj)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def clear_directory():
+    directory = get_directory()
+    if directory and Path(directory).is_dir():
+        for path in Path(directory).glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+def mark_process_dead(pid):
+    """
+    Вызывается мастером при выходе воркера: счётчики и гистограммы процесса
+    добавляются в archive.json, чтобы суммы не уменьшались, а gauge-значения
+    (память, число запросов воркера) пропадают вместе с ним.
+    """
+    directory = get_directory()
+    if not directory:
+        return
+    path = Path(directory) / f"{pid}.json"
+    data = _read(path)
+    if data is None:
+        return
+    archive = Path(directory) / ARCHIVE
+    counters, _, histograms = merge([_read(archive), {**data, "gauges": []}])
+    _write(
+        archive,
+        {
+            "counters": [
+                [name, labels, value] for (name, labels), value in counters.items()
+            ],
+            "gauges": [],
+            "histograms": [
+                [name, labels, *state] for (name, labels), state in histograms.items()
+            ],
+        },
+    )
+    path.unlink(missing_ok=True)
+
+
+def collect():
+    """Суммирует снимки всех процессов (и текущее состояние этого процесса)."""
+    flush(force=True)
+    snapshots = [snapshot()]
+    directory = get_directory()
+    if directory:
+        snapshots = [_read(path) for path in Path(directory).glob("*.json")]
+    return merge(snapshots)
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    gauges = defaultdict(float)
+    histograms = {}
+    for data in snapshots:
+        if data is None:
+            continue
+        for name, labels, value in data["counters"]:
+            counters[name, _freeze(labels)] += value
+        for name, labels, value in data.get("gauges", ()):
+            gauges[name, _freeze(labels)] += value
+        for name, labels, buckets, total, count in data["histograms"]:
+            key = (name, _freeze(labels))
+            state = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            state[0] = [a + b for a, b in zip(state[0], buckets, strict=True)]
+            state[1] += total
+            state[2] += count
+    return counters, gauges, histograms
+
+
+def _freeze(labels):
+    return tuple(tuple(pair) for pair in labels)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value)
+
+
+def render():
+    """Текстовый формат экспозиции Prometheus."""
+    counters, gauges, histograms = collect()
+    lines = []
+    for metric in METRICS.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind != "histogram":
+            values = counters if metric.kind == "counter" else gauges
+            for (name, labels), value in sorted(values.items()):
+                if name == metric.name:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+            continue
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            if name != metric.name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(metric.buckets, buckets, strict=True):
+                cumulative += bucket
+                bucket_labels = _format_labels(labels, [("le", _format_value(bound))])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _format_labels(labels, [("le", "+Inf")])
+            lines.append(f"{name}_bucket{inf_labels} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    # Доля попаданий считается из счётчиков, чтобы не заводить отдельный gauge.
+    lines.append("# HELP cache_hit_ratio Доля попаданий в кэш с момента запуска")
+    lines.append("# TYPE cache_hit_ratio gauge")
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for (name, labels), value in counters.items():
+        if name == CACHE_REQUESTS.name:
+            labels = dict(labels)
+            totals[labels["cache"]][labels["result"] == "hit"] += value
+    for cache, (misses, hits) in sorted(totals.items()):
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        lines.append(f'cache_hit_ratio{{cache="{cache}"}} {ratio!r}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_request_stats = ContextVar("metrics_request_stats", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    execute_wrapper, постоянно установленный на каждом соединении: считает
+    запросы в RequestStats текущего запроса. Статистика берётся из ContextVar,
+    поэтому учитываются и запросы async-представлений, выполняемые в потоках
+    sync_to_async.
+    """
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        # В начало списка: временные обёртки снимаются через pop().
+        connection.execute_wrappers.insert(0, count_query)
+
+
+class MetricsMiddleware:
+    """Гистограммы времени ответа и числа SQL-запросов по имени URL."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        started = time.perf_counter()
+        token = _request_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        started = time.perf_counter()
+        token = _request_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def record(request, response, stats, duration):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        REQUEST_DURATION.observe(duration, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        DB_QUERIES.observe(stats.queries, view=view)
+        DB_DURATION.observe(stats.db_time, view=view)
+        flush()
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+from main import search
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {search.SQLITE_TABLE} "
+                "USING fts5(title, description, company_name, "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {search.POSTGRES_TABLE} ("
+                "vacancy_id bigint PRIMARY KEY REFERENCES main_vacancy (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {search.POSTGRES_TABLE}_document_gin "
+                f"ON {search.POSTGRES_TABLE} USING gin (document)"
+            )
+        else:
+            return
+
+    Vacancy = apps.get_model("main", "Vacancy")
+    rows = Vacancy.objects.order_by().values_list(
+        "id", "title", "description", "company__name"
+    )
+    search.get_backend(connection).index_rows(list(rows))
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"DROP TABLE IF EXISTS {search.SQLITE_TABLE}")
+        elif connection.vendor == "postgresql":
+            cursor.execute(f"DROP TABLE IF EXISTS {search.POSTGRES_TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0006_event_alter_historicalvacancy_schedule_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:25
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0007_vacancy_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="vacancy_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at", "-id"],
+                name="vacancy_active_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["field", "-created_at", "-id"],
+                name="vacancy_active_field_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["employment_type", "-created_at", "-id"],
+                name="vacancy_active_employment_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["experience", "-created_at", "-id"],
+                name="vacancy_active_experience_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                django.db.models.functions.text.Lower("city"),
+                models.OrderBy(models.F("created_at"), descending=True),
+                models.OrderBy(models.F("id"), descending=True),
+                condition=models.Q(("is_active", True)),
+                name="vacancy_active_city_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["salary_min"],
+                name="vacancy_active_salary_min_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["salary_max"],
+                name="vacancy_active_salary_max_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0008_vacancy_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Готово"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "export_format",
+                    models.CharField(
+                        choices=[
+                            ("xlsx", "Excel (XLSX)"),
+                            ("csv", "CSV"),
+                            ("tsv", "TSV"),
+                        ],
+                        default="xlsx",
+                        max_length=10,
+                        verbose_name="Формат",
+                    ),
+                ),
+                (
+                    "only_active",
+                    models.BooleanField(default=True, verbose_name="Только активные"),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True, upload_to="exports/", verbose_name="Файл"
+                    ),
+                ),
+                (
+                    "row_count",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Строк"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Попыток"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Создана"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Начата"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Завершена"
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Пусто — вакансии всех компаний",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="main.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задача выгрузки",
+                "verbose_name_plural": "Задачи выгрузки",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"], name="exportjob_status_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0010_company_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistoryDelta",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "history_model",
+                    models.CharField(
+                        max_length=100, verbose_name="Историческая модель"
+                    ),
+                ),
+                (
+                    "history_record",
+                    models.PositiveBigIntegerField(verbose_name="Историческая запись"),
+                ),
+                ("field", models.CharField(max_length=100, verbose_name="Поле")),
+                ("patch", models.TextField(blank=True, verbose_name="Патч")),
+            ],
+            options={
+                "verbose_name": "Сжатое поле истории",
+                "verbose_name_plural": "Сжатые поля истории",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("history_model", "history_record", "field"),
+                        name="historydelta_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.10 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+import main.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0011_historydelta"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="logo_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="Варианты логотипа",
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="cover_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="Варианты обложки",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="company",
+            name="logo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=main.storage.ContentHashStorage(),
+                upload_to="logos/",
+                verbose_name="Логотип",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="cover_image",
+            field=models.ImageField(
+                blank=True,
+                storage=main.storage.ContentHashStorage(),
+                upload_to="events/",
+                verbose_name="Обложка",
+            ),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from simple_history.models import HistoricalRecords
+from django.db.models.functions import Lower
+
+from .history import BufferedHistoricalRecords, HistoryQuerySet
+from .storage import image_storage
 
 ROLE_CHOICES = (
     ("admin", "Администратор"),
@@ -34,6 +37,17 @@ RESPONSE_TYPE_CHOICES = (
     ("email", "Email"),
     ("external_link", "Внешняя ссылка"),
 )
+EXPORT_JOB_STATUS_CHOICES = (
+    ("queued", "В очереди"),
+    ("running", "Выполняется"),
+    ("done", "Готово"),
+    ("failed", "Ошибка"),
+)
+EXPORT_FORMAT_CHOICES = (
+    ("xlsx", "Excel (XLSX)"),
+    ("csv", "CSV"),
+    ("tsv", "TSV"),
+)
 APPLICATION_STATUS_CHOICES = (
     ("pending", "На рассмотрении"),
     ("reviewed", "Рассмотрено"),
@@ -46,8 +60,16 @@ class Company(models.Model):
     name = models.CharField("Название", max_length=255)
     description = models.TextField("Описание", blank=True)
     industry = models.CharField("Индустрия", max_length=100, blank=True)
-    logo = models.ImageField("Логотип", upload_to="logos/", blank=True, null=True)
-    history = HistoricalRecords()
+    logo = models.ImageField(
+        "Логотип", upload_to="logos/", storage=image_storage, blank=True, null=True
+    )
+    # Уменьшенные копии логотипа, см. main.images.
+    logo_variants = models.JSONField(
+        "Варианты логотипа", default=dict, blank=True, editable=False
+    )
+    updated_at = models.DateTimeField("Дата обновления", auto_now=True)
+    history = BufferedHistoricalRecords(excluded_fields=["logo_variants"])
+    objects = HistoryQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Компания"
@@ -155,12 +177,53 @@ class Vacancy(models.Model):
 
     created_at = models.DateTimeField("Дата создания", auto_now_add=True)
     updated_at = models.DateTimeField("Дата обновления", auto_now=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
+    objects = HistoryQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Вакансия"
         verbose_name_plural = "Вакансии"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="vacancy_created_idx"),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="vacancy_active_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["field", "-created_at", "-id"],
+                name="vacancy_active_field_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["employment_type", "-created_at", "-id"],
+                name="vacancy_active_employment_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["experience", "-created_at", "-id"],
+                name="vacancy_active_experience_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                Lower("city"),
+                models.F("created_at").desc(),
+                models.F("id").desc(),
+                name="vacancy_active_city_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["salary_min"],
+                name="vacancy_active_salary_min_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["salary_max"],
+                name="vacancy_active_salary_max_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} в {self.company.name}"
@@ -171,7 +234,12 @@ class Event(models.Model):
     description = models.TextField(blank=True)
     event_date = models.DateTimeField()
     location = models.CharField(max_length=255, blank=True)
-    cover_image = models.ImageField("Обложка", upload_to="events/", blank=True)
+    cover_image = models.ImageField(
+        "Обложка", upload_to="events/", storage=image_storage, blank=True
+    )
+    cover_variants = models.JSONField(
+        "Варианты обложки", default=dict, blank=True, editable=False
+    )
 
     def __str__(self):
         return self.title
@@ -192,10 +260,80 @@ class Application(models.Model):
     )
     notes = models.TextField(blank=True)
     applied_at = models.DateTimeField(auto_now_add=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
+    objects = HistoryQuerySet.as_manager()
 
     class Meta:
         unique_together = ("user", "vacancy")
 
     def __str__(self):
         return f"{self.user.full_name} → {self.vacancy.info.title if hasattr(self.vacancy, 'info') else 'Vacancy'}"
+
+
+class ExportJob(models.Model):
+    status = models.CharField(
+        "Статус", max_length=20, choices=EXPORT_JOB_STATUS_CHOICES, default="queued"
+    )
+    export_format = models.CharField(
+        "Формат", max_length=10, choices=EXPORT_FORMAT_CHOICES, default="xlsx"
+    )
+    company = models.ForeignKey(
+        Company,
+        verbose_name="Компания",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Пусто — вакансии всех компаний",
+    )
+    only_active = models.BooleanField("Только активные", default=True)
+    requested_by = models.ForeignKey(
+        User,
+        verbose_name="Автор",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    file = models.FileField("Файл", upload_to="exports/", blank=True)
+    row_count = models.PositiveIntegerField("Строк", null=True, blank=True)
+    error = models.TextField("Ошибка", blank=True)
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    created_at = models.DateTimeField("Создана", auto_now_add=True)
+    started_at = models.DateTimeField("Начата", null=True, blank=True)
+    finished_at = models.DateTimeField("Завершена", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Задача выгрузки"
+        verbose_name_plural = "Задачи выгрузки"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="exportjob_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Выгрузка #{self.pk} ({self.get_status_display()})"
+
+
+class HistoryDelta(models.Model):
+    """
+    Сжатое текстовое поле исторической записи: обратный diff относительно
+    более новой версии того же объекта (см. main.retention).
+    """
+
+    history_model = models.CharField("Историческая модель", max_length=100)
+    history_record = models.PositiveBigIntegerField("Историческая запись")
+    field = models.CharField("Поле", max_length=100)
+    patch = models.TextField("Патч", blank=True)
+
+    class Meta:
+        verbose_name = "Сжатое поле истории"
+        verbose_name_plural = "Сжатые поля истории"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["history_model", "history_record", "field"],
+                name="historydelta_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.history_model} #{self.history_record}: {self.field}"
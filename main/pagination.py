@@ -1,7 +1,374 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import caching, metrics
+
+COUNT_MODES = ("exact", "estimated", "cached", "none")
+# Оценке планировщика на маленьких выборках верить нельзя, а точный
+# COUNT(*) по ним и так дешёвый.
+ESTIMATE_EXACT_BELOW = 1000
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder обрезает время до миллисекунд, а ключу нужна точность.
+        if isinstance(o, datetime.datetime | datetime.date | datetime.time):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по ключу (keyset/cursor) вместо OFFSET.
+
+    Курсор хранит значения полей сортировки последней (или первой) строки
+    страницы, поэтому стоимость запроса не зависит от глубины страницы.
+    Последним полем сортировки должен быть уникальный ключ (обычно ``id``).
+    NULL-значения всегда идут в конце выдачи.
+    """
+
+    def __init__(self, queryset, ordering=("-created_at", "-id"), per_page=30):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [
+            (name.lstrip("-"), name.startswith("-")) for name in self.ordering
+        ]
+
+    def page(self, cursor=None):
+        queryset, reverse, has_cursor = self._page_query(cursor)
+        return self._build_page(list(queryset), reverse, has_cursor)
+
+    async def apage(self, cursor=None):
+        """То же, что page(), через async ORM."""
+        queryset, reverse, has_cursor = self._page_query(cursor)
+        return self._build_page([row async for row in queryset], reverse, has_cursor)
+
+    def _page_query(self, cursor):
+        if not cursor:
+            return self._ordered(reverse=False)[: self.per_page + 1], False, False
+        direction, position = self.decode_cursor(cursor)
+        reverse = direction == "p"
+        queryset = self._ordered(reverse=reverse).filter(
+            self._after(position, reverse=reverse)
+        )
+        return queryset[: self.per_page + 1], reverse, True
+
+    def _build_page(self, rows, reverse, has_cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if not has_cursor:
+            return KeysetPage(
+                rows,
+                next_cursor=self._cursor(rows[-1], "n") if has_more else None,
+            )
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage(rows)
+        if reverse:
+            return KeysetPage(
+                rows,
+                next_cursor=self._cursor(rows[-1], "n"),
+                previous_cursor=self._cursor(rows[0], "p") if has_more else None,
+            )
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor(rows[-1], "n") if has_more else None,
+            previous_cursor=self._cursor(rows[0], "p"),
+        )
+
+    def encode_cursor(self, direction, values):
+        payload = json.dumps(
+            {"d": direction, "v": values, "o": ",".join(self.ordering)},
+            cls=_CursorEncoder,
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, values = payload["d"], payload["v"]
+        except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+            raise InvalidCursor("Некорректный курсор") from exc
+
+        if direction not in ("n", "p") or not isinstance(values, list):
+            raise InvalidCursor("Некорректный курсор")
+        # Курсор другой сортировки (клиент сменил ?ordering=) ведёт не туда.
+        ordering = payload.get("o")
+        if len(values) != len(self.fields) or (
+            ordering is not None and ordering != ",".join(self.ordering)
+        ):
+            raise InvalidCursor("Курсор не соответствует сортировке")
+
+        position = []
+        for (name, _), value in zip(self.fields, values, strict=True):
+            model_field = self._model_field(name)
+            if model_field is not None and value is not None:
+                try:
+                    value = model_field.to_python(value)
+                except ValidationError as exc:
+                    raise InvalidCursor("Некорректный курсор") from exc
+            position.append(value)
+        return direction, position
+
+    def _cursor(self, row, direction):
+        return self.encode_cursor(
+            direction, [self._value(row, name) for name, _ in self.fields]
+        )
+
+    @staticmethod
+    def _value(row, name):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, name)
+
+    def _model_field(self, name):
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def _nullable(self, name):
+        model_field = self._model_field(name)
+        return model_field is not None and model_field.null
+
+    def _ordered(self, reverse):
+        expressions = []
+        for name, descending in self.fields:
+            expression = F(name).desc if descending != reverse else F(name).asc
+            if not self._nullable(name):
+                # Без NULLS FIRST/LAST, чтобы сортировку можно было взять из индекса.
+                expressions.append(expression())
+            elif reverse:
+                expressions.append(expression(nulls_first=True))
+            else:
+                expressions.append(expression(nulls_last=True))
+        return self.queryset.order_by(*expressions)
+
+    def _after(self, position, reverse):
+        """Условие «строго после позиции» в порядке выдачи (или до неё)."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.fields, position, strict=True):
+            step = self._step(name, descending, value, reverse)
+            if step is not None:
+                condition |= equal & step
+            equal &= (
+                Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+            )
+        return condition
+
+    def _step(self, name, descending, value, reverse):
+        nullable = self._nullable(name)
+        if value is None:
+            # NULL стоит в конце: после него ничего нет, до него — все значения.
+            return Q(**{f"{name}__isnull": False}) if reverse else None
+        lookup = "lt" if descending != reverse else "gt"
+        step = Q(**{f"{name}__{lookup}": value})
+        if nullable and not reverse:
+            step |= Q(**{f"{name}__isnull": True})
+        return step
+
+
+def exact_count(queryset):
+    return queryset.order_by().count()
+
+
+def estimated_count(queryset):
+    """
+    Число строк по оценке планировщика Postgres (EXPLAIN, без выполнения
+    запроса). Для других СУБД оценки нет — возвращает None.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    estimate = plan[0]["Plan"]["Plan Rows"]
+    if estimate < ESTIMATE_EXACT_BELOW:
+        return exact_count(queryset)
+    return estimate
+
+
+def cached_count(queryset, namespace):
+    """
+    Точное число строк из кэша: ключ — текст запроса и поколение данных
+    ``namespace``, поэтому любое изменение сбрасывает все счётчики разом.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.sha1(repr((sql, params)).encode()).hexdigest()
+    key = f"count:{namespace}:{caching.get_version(namespace)}:{digest}"
+    count = cache.get(key)
+    metrics.cache_result("count", count is not None)
+    if count is None:
+        count = exact_count(queryset)
+        cache.set(key, count, getattr(settings, "API_COUNT_CACHE_TIMEOUT", 600))
+    return count
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Курсорная пагинация API на ``KeysetPaginator``: страница — один запрос
+    ``WHERE (ключ) < (курсор) LIMIT n`` без OFFSET.
+
+    Сортировка берётся из queryset (``OrderingFilter``, поиск) или из
+    ``Meta.ordering`` модели и дополняется ``id``, чтобы ключ был уникальным.
+    ``?count=`` выбирает, как считать ``count``: exact — COUNT(*), estimated —
+    оценка планировщика Postgres, cached — COUNT(*) из кэша до изменения
+    данных, none — не считать. С ``?page=`` работает прежняя постраничная
+    пагинация со смещением.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    page_query_param = "page"
+    fallback_class = StandardResultsSetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if request.query_params.get(self.page_query_param):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        count_mode = self.get_count_mode(request)
+        paginator = KeysetPaginator(
+            queryset, self.get_ordering(queryset), self.get_page_size(request)
+        )
+        try:
+            self.page = paginator.page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor as exc:
+            raise exceptions.NotFound(str(exc)) from exc
+        self.count_mode, self.count = self.get_count(queryset, view, count_mode)
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(
+            {
+                "count": self.count,
+                "count_mode": self.count_mode,
+                "next": self.get_link(self.page.next_cursor),
+                "previous": self.get_link(self.page.previous_cursor),
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(
+            self.count_query_param, getattr(settings, "API_COUNT_MODE", "exact")
+        )
+        if mode not in COUNT_MODES:
+            raise exceptions.ValidationError(
+                {
+                    self.count_query_param: [
+                        "Допустимые значения: " + ", ".join(COUNT_MODES)
+                    ]
+                }
+            )
+        return mode
+
+    @staticmethod
+    def get_ordering(queryset):
+        ordering = [name for name in queryset.query.order_by if isinstance(name, str)]
+        if not ordering:
+            ordering = list(queryset.model._meta.ordering)
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            name.replace("pk", pk_name) if name.lstrip("-") == "pk" else name
+            for name in ordering
+        ]
+        if pk_name not in (name.lstrip("-") for name in ordering):
+            descending = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append(f"-{pk_name}" if descending else pk_name)
+        return ordering
+
+    @staticmethod
+    def get_count(queryset, view, mode):
+        """Пара (фактический режим, число строк)."""
+        if mode == "none":
+            return mode, None
+        # ConditionalGetMixin уже посчитал строки для ETag — второй COUNT не нужен.
+        known = getattr(view, "filtered_count", None)
+        if mode == "exact" and known is not None:
+            return mode, known
+        if mode == "estimated":
+            estimate = estimated_count(queryset)
+            if estimate is not None:
+                return mode, estimate
+            mode = "cached"
+        namespace = getattr(view, "cache_namespaces", {}).get(
+            getattr(view, "action", None)
+        )
+        if mode == "cached" and namespace is not None:
+            return mode, cached_count(queryset, namespace)
+        return "exact", exact_count(queryset)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
@@ -0,0 +1,236 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_profile", default=None)
+
+DUPLICATES_REPORTED = 5
+
+
+class RequestProfile:
+    """Замеры одного запроса: SQL и время отдельных этапов."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.spans = Counter()
+        self._active = set()
+
+    def record_query(self, alias, sql, duration):
+        self.queries.append({"alias": alias, "sql": sql, "duration": duration})
+
+    @property
+    def db_time(self):
+        return sum(query["duration"] for query in self.queries)
+
+    def duplicates(self):
+        """Одинаковые SQL (с точностью до параметров), выполненные больше раза."""
+        counts = Counter(query["sql"] for query in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+    def summary(self, total):
+        duplicates = self.duplicates()
+        return {
+            "duration_ms": round(total * 1000, 2),
+            "queries": len(self.queries),
+            "db_ms": round(self.db_time * 1000, 2),
+            "duplicate_queries": sum(count - 1 for _, count in duplicates),
+            "template_ms": round(self.spans["template"] * 1000, 2),
+            "serializer_ms": round(self.spans["serializer"] * 1000, 2),
+        }
+
+
+def current_profile():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Добавляет время блока к этапу ``name`` текущего запроса. Вложенные блоки
+    с тем же именем не учитываются повторно. Вне профилируемого запроса
+    ничего не делает.
+    """
+    profile = _current.get()
+    if profile is None or name in profile._active:
+        yield
+        return
+    profile._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans[name] += time.perf_counter() - started
+        profile._active.discard(name)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    execute_wrapper, постоянно установленный на каждом соединении: время SQL
+    для профилируемого запроса (профиль берётся из ContextVar, поэтому
+    работает и в async-представлениях).
+    """
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(
+            context["connection"].alias, sql, time.perf_counter() - started
+        )
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        # В начало списка: временные обёртки снимаются через pop().
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class ProfilingMiddleware:
+    """
+    Для доли запросов ``PROFILING_SAMPLE_RATE`` считает SQL-запросы, время БД,
+    повторяющиеся запросы, рендеринг шаблонов и сериализацию. Результат
+    уходит в заголовок Server-Timing и строкой в лог ``main.profiling``;
+    запросы дольше ``PROFILING_SLOW_MS`` сохраняются целиком в
+    ``PROFILING_DUMP_DIR``. При нулевой доле middleware отключается.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.slow_ms = getattr(settings, "PROFILING_SLOW_MS", 500)
+        self.dump_dir = getattr(settings, "PROFILING_DUMP_DIR", None)
+        self.max_dumps = getattr(settings, "PROFILING_MAX_DUMPS", 200)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, profile)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def report(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        summary = profile.summary(total)
+        response["Server-Timing"] = server_timing(summary)
+        logger.info(
+            "%s %s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            json.dumps(summary),
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **summary,
+            },
+        )
+        if self.dump_dir and summary["duration_ms"] >= self.slow_ms:
+            self.dump(request, response, profile, summary)
+        return response
+
+    def dump(self, request, response, profile, summary):
+        directory = Path(self.dump_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^\w-]+", "_", request.path).strip("_")[:60] or "root"
+        stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+        data = {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            **summary,
+            "duplicates": [
+                {"sql": sql, "count": count}
+                for sql, count in profile.duplicates()[:DUPLICATES_REPORTED]
+            ],
+            "sql": [
+                {**query, "duration": round(query["duration"] * 1000, 3)}
+                for query in profile.queries
+            ],
+        }
+        path = directory / f"{stamp}-{request.method}-{slug}.json"
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+        # Храним только последние дампы.
+        dumps = sorted(directory.glob("*.json"))
+        for old in dumps[: max(len(dumps) - self.max_dumps, 0)]:
+            old.unlink(missing_ok=True)
+
+
+def server_timing(summary):
+    return ", ".join(
+        [
+            f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries, '
+            f'{summary["duplicate_queries"]} duplicate"',
+            f"tpl;dur={summary['template_ms']}",
+            f"ser;dur={summary['serializer_ms']}",
+            f"total;dur={summary['duration_ms']}",
+        ]
+    )
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        with span("template"):
+            return super().render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates, засекающий рендеринг для ProfilingMiddleware."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Сессия и пользователь: два запроса на любой запрос под авторизацией.
+AUTH_QUERIES = 2
+
+# Число запросов на страницу, не зависящее от числа строк (без AUTH_QUERIES).
+# Считается при выключенных кэшах (UNCACHED) и пустом справочнике
+# направлений: в списках API это и промах кэша COUNT(*) при ?count=cached по
+# умолчанию. Проверяется тестами main.tests и командой check_query_budgets.
+BUDGETS = (
+    ("API: список вакансий", "/api/vacancies/", 5),
+    ("API: список вакансий с фильтром", "/api/vacancies/?employment_type=full", 5),
+    ("API: активные вакансии", "/api/vacancies/active/", 2),
+    ("API: вакансия", "/api/vacancies/{vacancy}/", 2),
+    ("API: список компаний", "/api/companies/", 3),
+    ("API: компания", "/api/companies/{company}/", 2),
+    ("Страница вакансий", "/vacancies", 3),
+    ("Страница вакансии", "/vacancies/{vacancy}", 1),
+    ("Страница компаний", "/companies", 1),
+    ("Админка: компании", "/admin/main/company/", 4),
+    ("Админка: вакансии", "/admin/main/vacancy/", 6),
+    ("Админка: пользователи", "/admin/main/user/", 4),
+)
+UNCACHED = {
+    "RESPONSE_CACHE_TIMEOUT": 0,
+    "FACETS_CACHE_TIMEOUT": 0,
+    "API_COUNT_CACHE_TIMEOUT": 0,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, limit, queries):
+        self.limit = limit
+        self.queries = queries
+        lines = "\n".join(
+            f"{index}. {query['sql']}" for index, query in enumerate(queries, 1)
+        )
+        super().__init__(
+            f"Выполнено запросов: {len(queries)}, допустимо: {limit}\n{lines}"
+        )
+
+
+@contextmanager
+def query_budget(limit, using=DEFAULT_DB_ALIAS):
+    """
+    Падает с ``QueryBudgetExceeded``, если блок выполнил больше ``limit``
+    SQL-запросов. Работает и как декоратор::
+
+        with query_budget(3):
+            client.get("/api/vacancies/")
+    """
+    context = CaptureQueriesContext(connections[using])
+    with context:
+        yield context
+    if len(context) > limit:
+        raise QueryBudgetExceeded(limit, context.captured_queries)
@@ -0,0 +1,235 @@
+import functools
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from . import images, profiling
+from .serializers import ImageVariantsField
+
+# Поля, у которых представление совпадает со значением из .values().
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.FloatField,
+    PrimaryKeyRelatedField,
+)
+
+
+class Unsupported(Exception):
+    pass
+
+
+class FileColumn:
+    """Столбец FileField/ImageField: в .values() имя файла, URL даёт хранилище."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+
+class RowPlan:
+    """
+    Скомпилированный сериализатор: столбцы для ``.values()`` и для каждого
+    поля ответа — столбец и вид преобразования (None, "datetime",
+    "variants", FileColumn). Вложенный сериализатор — отдельный план с
+    ключом ``key`` (столбец внешнего ключа): NULL в нём даёт ``null``
+    вместо объекта.
+    """
+
+    def __init__(self, fields, key=None):
+        self.fields = fields
+        self.key = key
+        self.columns = [key] if key else []
+        for _, column, kind in fields:
+            if isinstance(kind, RowPlan):
+                self.columns += kind.columns
+            else:
+                self.columns.append(column)
+
+    def bind(self, request=None):
+        """Функция «строка .values() → dict ответа» для одного запроса."""
+        zone = timezone.get_current_timezone() if settings.USE_TZ else None
+        fields = [
+            (name, column, self.converter(kind, request, zone))
+            for name, column, kind in self.fields
+        ]
+
+        def represent(row):
+            data = {}
+            for name, column, convert in fields:
+                if column is None:
+                    data[name] = convert(row)
+                    continue
+                value = row[column]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                data[name] = value
+            return data
+
+        return represent
+
+    @staticmethod
+    def converter(kind, request, zone):
+        if kind is None:
+            return None
+        if kind == "datetime":
+            return functools.partial(_datetime, zone=zone)
+        if isinstance(kind, FileColumn):
+            return functools.partial(_file_url, storage=kind.storage, request=request)
+        if kind == "variants":
+            return functools.partial(images.variant_urls, request=request)
+        nested = kind.bind(request)
+        key = kind.key
+        return lambda row: None if row[key] is None else nested(row)
+
+    def row(self, instance):
+        """Строка в формате .values() из уже загруженного объекта."""
+        return {column: _attribute(instance, column) for column in self.columns}
+
+
+def _attribute(instance, column):
+    *path, name = column.split("__")
+    for part in path:
+        instance = getattr(instance, part)
+        if instance is None:
+            return None
+    field = instance._meta.get_field(name)
+    if field.is_relation:
+        return getattr(instance, field.attname)
+    value = getattr(instance, name)
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def _datetime(value, zone):
+    # Как serializers.DateTimeField: текущая зона и "Z" вместо "+00:00".
+    if zone is not None and timezone.is_aware(value):
+        value = value.astimezone(zone)
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _file_url(name, storage, request):
+    # Как serializers.FileField с UPLOADED_FILES_USE_URL: абсолютный URL.
+    if not name:
+        return None
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def compile_serializer(serializer, prefix="", key=None):
+    """
+    План чтения по готовому (уже урезанному ?fields=) DRF-сериализатору.
+    Поля, которые нельзя прочитать из ``.values()`` один к одному, дают
+    Unsupported — тогда остаётся обычный сериализатор.
+    """
+    model = serializer.Meta.model
+    fields = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*" or "." in field.source:
+            raise Unsupported(name)
+        column = prefix + field.source
+        if isinstance(field, serializers.ListSerializer | serializers.ManyRelatedField):
+            raise Unsupported(name)
+        if isinstance(field, serializers.BaseSerializer):
+            # Столбца у вложенного объекта нет: план читает строку целиком.
+            nested = compile_serializer(field, column + "__", key=column)
+            fields.append((name, None, nested))
+        elif isinstance(field, ImageVariantsField):
+            fields.append((name, column, "variants"))
+        elif isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            if str(output_format).lower() != "iso-8601":
+                raise Unsupported(name)
+            fields.append((name, column, "datetime"))
+        elif isinstance(field, serializers.FileField):
+            if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+                raise Unsupported(name)
+            storage = model._meta.get_field(field.source).storage
+            fields.append((name, column, FileColumn(storage)))
+        elif isinstance(field, PLAIN_FIELDS) and not isinstance(
+            field, serializers.MultipleChoiceField
+        ):
+            fields.append((name, column, None))
+        else:
+            raise Unsupported(name)
+    return RowPlan(fields, key=key)
+
+
+@functools.lru_cache(maxsize=256)
+def get_plan(serializer_class, fields=None, expand=None):
+    context = {}
+    if fields is not None:
+        context["fields"] = set(fields)
+    if expand is not None:
+        context["expand"] = set(expand)
+    try:
+        return compile_serializer(serializer_class(context=context))
+    except Unsupported:
+        return None
+
+
+class ValuesReadMixin:
+    """
+    Список и объект DRF-viewset без ModelSerializer: ``serializer_class``
+    (с учётом ?fields=/?expand=, см. main.fieldsets) один раз компилируется в
+    план — столбцы ``.values()`` с присоединёнными полями компании и
+    преобразователь на каждое поле. Вывод совпадает с сериализатором.
+    Запись и проверка данных остаются на ``serializer_class``.
+    Выключается настройкой API_FAST_READ.
+    """
+
+    def get_read_plan(self):
+        if not getattr(settings, "API_FAST_READ", True):
+            return None
+        fields, expand = (
+            self.get_fieldset() if hasattr(self, "get_fieldset") else (None, None)
+        )
+        return get_plan(
+            self.get_serializer_class(),
+            frozenset(fields) if fields is not None else None,
+            frozenset(expand) if expand is not None else None,
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        plan = self.get_read_plan()
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        # Поля сортировки нужны курсору, даже если их нет в ответе.
+        ordering = []
+        if hasattr(self.paginator, "get_ordering"):
+            ordering = [
+                name.lstrip("-") for name in self.paginator.get_ordering(queryset)
+            ]
+        rows = queryset.values(*dict.fromkeys([*plan.columns, *ordering]))
+        page = self.paginate_queryset(rows)
+        represent = plan.bind(self.request)
+        with profiling.span("serializer"):
+            data = [represent(row) for row in (rows if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None:
+            return super().retrieve(request, *args, **kwargs)
+        instance = self.get_object()
+        with profiling.span("serializer"):
+            data = plan.bind(request)(plan.row(instance))
+        return Response(data)
@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без неё — json из stdlib
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если пакет установлен. Вывод тот же: даты и
+    прочие нестандартные типы кодирует encoder_class DRF, а с отступами
+    (браузерный API, ``Accept: application/json; indent=2``) работает
+    обычный рендерер.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        # Как JSONRenderer: U+2028/U+2029 экранируются для встраивания в JS.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -1,7 +1,7 @@
 from import_export import resources
 from import_export.fields import Field
 
-from . import models
+from . import lookups
 from .models import Vacancy
 
 
@@ -21,17 +21,13 @@ class VacancyResource(resources.ModelResource):
     created_at = Field(attribute="created_at", column_name="Создана")
 
     def dehydrate_employment_type(self, vacancy):
-        return dict(models.EMPLOYMENT_TYPE_CHOICES).get(
-            vacancy.employment_type, vacancy.employment_type
-        )
+        return lookups.EMPLOYMENT_TYPES.label(vacancy.employment_type)
 
     def dehydrate_experience(self, vacancy):
-        return dict(models.EXPERIENCE_CHOICES).get(
-            vacancy.experience, vacancy.experience
-        )
+        return lookups.EXPERIENCE.label(vacancy.experience)
 
     def dehydrate_schedule(self, vacancy):
-        return dict(models.SCHEDULE_CHOICES).get(vacancy.schedule, vacancy.schedule)
+        return lookups.SCHEDULES.label(vacancy.schedule)
 
     class Meta:
         model = Vacancy
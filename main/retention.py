@@ -0,0 +1,256 @@
+import gzip
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+
+from diff_match_patch import diff_match_patch
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+
+from .models import HistoryDelta
+
+TRACKED_MODELS = ("main.Company", "main.Vacancy", "main.Application")
+BATCH_SIZE = 200
+
+_dmp = diff_match_patch()
+
+
+def get_policy():
+    """Настройка HISTORY_RETENTION с подставленными значениями по умолчанию."""
+    policy = {
+        "compact_after_days": 30,
+        "archive_after_days": 365,
+        "archive_dir": Path(settings.BASE_DIR) / "history_archive",
+    }
+    policy.update(getattr(settings, "HISTORY_RETENTION", {}))
+    return policy
+
+
+def history_models():
+    return [apps.get_model(label).history.model for label in TRACKED_MODELS]
+
+
+def text_fields(history_model):
+    return [
+        f.attname
+        for f in history_model._meta.concrete_fields
+        if isinstance(f, models.TextField) and f.name != "history_change_reason"
+    ]
+
+
+def make_patch(newer, older):
+    """Патч, превращающий более новый текст в более старый."""
+    return _dmp.patch_toText(_dmp.patch_make(newer or "", older or ""))
+
+
+def apply_patch(newer, patch):
+    if not patch:
+        return newer
+    text, results = _dmp.patch_apply(_dmp.patch_fromText(patch), newer or "")
+    if not all(results):
+        raise ValueError("Патч истории не применяется к более новой версии")
+    return text
+
+
+@dataclass
+class Stats:
+    rows: int = 0
+    fields: int = 0
+    bytes_saved: int = 0
+    files: set = field(default_factory=set)
+
+
+@dataclass
+class Version:
+    """Историческая запись с восстановленным текстом сжатых полей."""
+
+    row: dict
+    texts: dict
+    compacted: set
+    newest: bool
+
+
+def walk(history_model, object_ids):
+    """
+    Версии объектов ``object_ids`` от новой к старой. Самая новая запись
+    объекта всегда хранит полный текст, остальные восстанавливаются
+    применением обратных патчей по цепочке.
+    """
+    label = history_model._meta.label_lower
+    fields = text_fields(history_model)
+    rows = list(
+        history_model._base_manager.filter(id__in=object_ids)
+        .order_by("id", "-history_date", "-history_id")
+        .values()
+    )
+    deltas = defaultdict(dict)
+    for delta in HistoryDelta.objects.filter(
+        history_model=label,
+        history_record__in=[row["history_id"] for row in rows],
+    ):
+        deltas[delta.history_record][delta.field] = delta.patch
+
+    for _, versions in groupby(rows, key=lambda row: row["id"]):
+        newer = None
+        for row in versions:
+            patches = deltas.get(row["history_id"], {})
+            texts = {
+                name: apply_patch(newer[name], patches[name])
+                if name in patches
+                else row[name]
+                for name in fields
+            }
+            yield Version(row, texts, set(patches), newer is None)
+            newer = texts
+
+
+def _object_ids(history_model, before, batch_size):
+    ids = (
+        history_model._base_manager.filter(history_date__lt=before)
+        .order_by("id")
+        .values_list("id", flat=True)
+        .distinct()
+    )
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        yield ids[start : start + batch_size]
+
+
+def compact(history_model, before, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Заменяет текстовые поля записей старше ``before`` обратными патчами
+    относительно следующей версии объекта. Неизменившееся поле
+    превращается в пустой патч. Менеджер истории моделей восстанавливает
+    текст при чтении (main.history.RestoringHistoricalQuerySet).
+    """
+    label = history_model._meta.label_lower
+    stats = Stats()
+    for object_ids in _object_ids(history_model, before, batch_size):
+        new_deltas = []
+        blanked = defaultdict(list)
+        newer = None
+        for version in walk(history_model, object_ids):
+            if version.newest:
+                newer = version.texts
+                continue
+            if version.row["history_date"] < before:
+                names = []
+                for name, text in version.texts.items():
+                    if name in version.compacted or not text:
+                        continue
+                    patch = make_patch(newer[name], text)
+                    if len(patch) >= len(text):
+                        continue
+                    new_deltas.append(
+                        HistoryDelta(
+                            history_model=label,
+                            history_record=version.row["history_id"],
+                            field=name,
+                            patch=patch,
+                        )
+                    )
+                    names.append(name)
+                    stats.bytes_saved += len(text) - len(patch)
+                if names:
+                    blanked[tuple(names)].append(version.row["history_id"])
+                    stats.rows += 1
+                    stats.fields += len(names)
+            newer = version.texts
+
+        if dry_run or not new_deltas:
+            continue
+        with transaction.atomic():
+            HistoryDelta.objects.bulk_create(new_deltas, batch_size=500)
+            for names, history_ids in blanked.items():
+                history_model._base_manager.filter(history_id__in=history_ids).update(
+                    **dict.fromkeys(names, "")
+                )
+    return stats
+
+
+def expire(
+    history_model, before, archive_dir=None, batch_size=BATCH_SIZE, dry_run=False
+):
+    """
+    Удаляет записи старше ``before``, кроме последней версии каждого объекта.
+    Если задан ``archive_dir``, перед удалением дописывает их с полным текстом
+    в ``<archive_dir>/<модель>/<ГГГГ-ММ>.jsonl.gz``.
+    """
+    label = history_model._meta.label_lower
+    stats = Stats()
+    for object_ids in _object_ids(history_model, before, batch_size):
+        expired = [
+            version
+            for version in walk(history_model, object_ids)
+            if not version.newest and version.row["history_date"] < before
+        ]
+        if not expired:
+            continue
+        stats.rows += len(expired)
+        if dry_run:
+            continue
+        history_ids = [version.row["history_id"] for version in expired]
+        with transaction.atomic():
+            if archive_dir is not None:
+                stats.files |= _write_archive(Path(archive_dir) / label, expired)
+            HistoryDelta.objects.filter(
+                history_model=label, history_record__in=history_ids
+            ).delete()
+            history_model._base_manager.filter(history_id__in=history_ids).delete()
+    return stats
+
+
+def _write_archive(directory, versions):
+    directory.mkdir(parents=True, exist_ok=True)
+    by_month = defaultdict(list)
+    for version in versions:
+        by_month[version.row["history_date"].strftime("%Y-%m")].append(version)
+    paths = set()
+    for month, group in by_month.items():
+        path = directory / f"{month}.jsonl.gz"
+        # gzip допускает дописывание: файл становится набором потоков.
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            for version in group:
+                record = {**version.row, **version.texts}
+                archive.write(
+                    json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+                )
+                archive.write("\n")
+        paths.add(path)
+    return paths
+
+
+def restore_many(history_instances):
+    """
+    Восстанавливает текст сжатых полей у загруженных исторических записей
+    одной модели: один запрос к HistoryDelta, а если сжатых среди них нет —
+    больше ничего.
+    """
+    if not history_instances:
+        return history_instances
+    history_model = type(history_instances[0])
+    if history_model.instance_type._meta.label not in TRACKED_MODELS:
+        return history_instances
+    by_history_id = {item.history_id: item for item in history_instances}
+    compacted = HistoryDelta.objects.filter(
+        history_model=history_model._meta.label_lower,
+        history_record__in=by_history_id,
+    ).values_list("history_record", flat=True)
+    object_ids = {by_history_id[history_id].id for history_id in compacted}
+    if not object_ids:
+        return history_instances
+    for version in walk(history_model, object_ids):
+        item = by_history_id.get(version.row["history_id"])
+        if item is not None:
+            for name in version.compacted:
+                setattr(item, name, version.texts[name])
+    return history_instances
+
+
+def restore(history_instance):
+    """Исторический экземпляр с восстановленным текстом сжатых полей."""
+    return restore_many([history_instance])[0]
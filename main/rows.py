@@ -0,0 +1,48 @@
+from collections.abc import Mapping
+
+
+class ModelRow(Mapping):
+    """
+    Ленивое представление экземпляра модели в виде словаря для шаблонов.
+
+    В отличие от ``model_to_dict`` ничего не копирует заранее: значение поля
+    читается только при обращении, а внешние ключи отдаются как ``ModelRow``
+    связанного объекта (достаточно ``select_related``, чтобы не было запросов).
+    """
+
+    __slots__ = ("instance",)
+
+    def __init__(self, instance):
+        self.instance = instance
+
+    def __getitem__(self, key):
+        field = self._fields().get(key)
+        if field is None:
+            raise KeyError(key)
+        if field.is_relation:
+            related = getattr(self.instance, field.name)
+            return ModelRow(related) if related is not None else None
+        return getattr(self.instance, field.attname)
+
+    def __iter__(self):
+        return iter(self._fields())
+
+    def __len__(self):
+        return len(self._fields())
+
+    def __repr__(self):
+        return f"<ModelRow {self.instance!r}>"
+
+    def _fields(self):
+        return _concrete_fields(type(self.instance))
+
+
+_FIELDS_CACHE = {}
+
+
+def _concrete_fields(model):
+    fields = _FIELDS_CACHE.get(model)
+    if fields is None:
+        fields = {field.name: field for field in model._meta.concrete_fields}
+        _FIELDS_CACHE[model] = fields
+    return fields
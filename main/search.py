@@ -0,0 +1,247 @@
+from django.db import connection as default_connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .stemming import tokenize
+
+SQLITE_TABLE = "main_vacancy_fts"
+POSTGRES_TABLE = "main_vacancy_search"
+
+
+class SearchBackend:
+    """
+    Полнотекстовый поиск по вакансиям: название, описание и название компании.
+
+    ``search()`` фильтрует queryset вакансий и добавляет аннотацию
+    ``search_rank`` (чем больше, тем релевантнее). Индекс обновляется
+    сигналами ``main.signals``; массовые операции в обход сигналов должны
+    вызывать ``index_vacancies()`` сами.
+    """
+
+    rank_alias = "search_rank"
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, queryset, query, order=True):
+        raise NotImplementedError
+
+    def empty(self, queryset, order=True):
+        queryset = queryset.none()
+        if order:
+            queryset = queryset.annotate(**{self.rank_alias: Value(0.0)})
+        return queryset
+
+    def index_rows(self, rows):
+        """Индексирует строки вида (id, title, description, company_name)."""
+        raise NotImplementedError
+
+    def index_vacancies(self, ids):
+        from .models import Vacancy
+
+        ids = list(ids)
+        if not ids:
+            return
+        rows = Vacancy.objects.filter(id__in=ids).values_list(
+            "id", "title", "description", "company__name"
+        )
+        self.index_rows(rows)
+
+    def remove_vacancies(self, ids):
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=2000):
+        from .models import Vacancy
+
+        self.clear()
+        rows = (
+            Vacancy.objects.order_by()
+            .values_list("id", "title", "description", "company__name")
+            .iterator(chunk_size=batch_size)
+        )
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.index_rows(batch)
+                batch = []
+        if batch:
+            self.index_rows(batch)
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    # Веса столбцов для bm25: title, description, company_name.
+    weights = (10.0, 1.0, 5.0)
+
+    def search(self, queryset, query, order=True):
+        match = self.match_expression(query)
+        if match is None:
+            return self.empty(queryset, order)
+        table = queryset.model._meta.db_table
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s",
+                (match,),
+            )
+        )
+        if not order:
+            return queryset
+        weights = ", ".join(str(w) for w in self.weights)
+        rank = RawSQL(
+            f"SELECT -bm25({SQLITE_TABLE}, {weights}) FROM {SQLITE_TABLE} "
+            f'WHERE {SQLITE_TABLE} MATCH %s AND {SQLITE_TABLE}.rowid = "{table}"."id"',
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(**{self.rank_alias: rank}).order_by(
+            f"-{self.rank_alias}", "-created_at", "-id"
+        )
+
+    @staticmethod
+    def match_expression(query):
+        terms = tokenize(query)
+        if not terms:
+            return None
+        return " AND ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+    def index_rows(self, rows):
+        params = [
+            (
+                vacancy_id,
+                " ".join(tokenize(title)),
+                " ".join(tokenize(description)),
+                " ".join(tokenize(company_name)),
+            )
+            for vacancy_id, title, description, company_name in rows
+        ]
+        if not params:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s",
+                [(row[0],) for row in params],
+            )
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_TABLE} (rowid, title, description, company_name) "
+                "VALUES (%s, %s, %s, %s)",
+                params,
+            )
+
+    def remove_vacancies(self, ids):
+        ids = [(vacancy_id,) for vacancy_id in ids]
+        if not ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", ids)
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+
+
+class PostgresSearchBackend(SearchBackend):
+    document_sql = (
+        "setweight(to_tsvector('russian', coalesce(v.title, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(c.name, '')), 'B') || "
+        "setweight(to_tsvector('russian', coalesce(v.description, '')), 'C')"
+    )
+
+    def search(self, queryset, query, order=True):
+        query = self.tsquery_text(query)
+        if query is None:
+            return self.empty(queryset, order)
+        table = queryset.model._meta.db_table
+        # Основы уже посчитаны tokenize(): 'simple' не стеммит их повторно.
+        tsquery = "to_tsquery('simple', %s)"
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT vacancy_id FROM {POSTGRES_TABLE} WHERE document @@ {tsquery}",
+                (query,),
+            )
+        )
+        if not order:
+            return queryset
+        # float8, а не real: значение из курсора API сравнивается с рангом
+        # точно, иначе строки с равным рангом на границе страницы теряются.
+        rank = RawSQL(
+            f"SELECT ts_rank_cd(document, {tsquery})::float8 "
+            f"FROM {POSTGRES_TABLE} "
+            f'WHERE vacancy_id = "{table}"."id"',
+            (query,),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(**{self.rank_alias: rank}).order_by(
+            f"-{self.rank_alias}", "-created_at", "-id"
+        )
+
+    @staticmethod
+    def tsquery_text(query):
+        """
+        Те же префиксы основ, что и в SQLiteFTSBackend.match_expression:
+        «разраб» находит «разработчиков».
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+        return " & ".join(f"'{term}':*" for term in terms)
+
+    def index_vacancies(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_TABLE} (vacancy_id, document) "
+                f"SELECT v.id, {self.document_sql} FROM main_vacancy v "
+                "JOIN main_company c ON c.id = v.company_id WHERE v.id = ANY(%s) "
+                "ON CONFLICT (vacancy_id) DO UPDATE SET document = EXCLUDED.document",
+                (ids,),
+            )
+
+    def index_rows(self, rows):
+        self.index_vacancies(row[0] for row in rows)
+
+    def remove_vacancies(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {POSTGRES_TABLE} WHERE vacancy_id = ANY(%s)", (ids,)
+            )
+
+    def rebuild(self, batch_size=2000):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_TABLE} (vacancy_id, document) "
+                f"SELECT v.id, {self.document_sql} FROM main_vacancy v "
+                "JOIN main_company c ON c.id = v.company_id"
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    try:
+        return BACKENDS[connection.vendor](connection)
+    except KeyError:
+        raise NotImplementedError(
+            f"Полнотекстовый поиск не поддерживается для {connection.vendor}"
+        ) from None
+
+
+def search_vacancies(queryset, query, order=True):
+    return get_backend().search(queryset, query, order=order)
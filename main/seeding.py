@@ -0,0 +1,151 @@
+import random
+
+from faker import Faker
+
+# Генераторы строк для manage.py seed в режиме больших объёмов.
+# Модуль не импортирует Django: функции вызываются в процессах пула (spawn)
+# и возвращают словари, а вставку делает основной процесс. Каждая пачка
+# получает собственное зерно, поэтому результат не зависит от числа процессов.
+
+LOCALE = "ru_RU"
+
+FIELDS_OF_STUDY = (
+    "Информатика",
+    "Экономика",
+    "Менеджмент",
+    "Юриспруденция",
+    "Лингвистика",
+    "Журналистика",
+    "Психология",
+    "Дизайн",
+    "Маркетинг",
+    "Инженерия",
+)
+INDUSTRIES = (
+    "IT",
+    "Финансы",
+    "Энергетика",
+    "Телеком",
+    "Ритейл",
+    "Производство",
+    "Медицина",
+    "Образование",
+    "Логистика",
+    "Медиа",
+)
+PARTNER_SHARE = 0.1
+
+_context = {}
+
+
+def init_worker(context):
+    """Инициализатор пула: id уже вставленных строк и значения справочников."""
+    _context.clear()
+    _context.update(context)
+
+
+def _random(seed, kind, chunk):
+    state = f"{seed}:{kind}:{chunk}"
+    fake = Faker(LOCALE)
+    fake.seed_instance(state)
+    return fake, random.Random(state)
+
+
+def companies(chunk, start, count, seed):
+    fake, rnd = _random(seed, "companies", chunk)
+    return [
+        {
+            "name": fake.company(),
+            "description": fake.catch_phrase(),
+            "industry": rnd.choice(INDUSTRIES),
+        }
+        for _ in range(count)
+    ]
+
+
+def users(chunk, start, count, seed):
+    fake, rnd = _random(seed, "users", chunk)
+    company_ids = _context["company_ids"]
+    rows = []
+    for number in range(start, start + count):
+        partner = company_ids and rnd.random() < PARTNER_SHARE
+        rows.append(
+            {
+                "email": f"user{number}@example.ru",
+                "full_name": fake.name(),
+                "role": "partner" if partner else "student",
+                "company_id": rnd.choice(company_ids) if partner else None,
+                "password": _context["password"],
+            }
+        )
+    return rows
+
+
+def vacancies(chunk, start, count, seed):
+    fake, rnd = _random(seed, "vacancies", chunk)
+    rows = []
+    for _ in range(count):
+        salary_min = rnd.choice((None, rnd.randrange(30, 250) * 1000))
+        salary_max = rnd.choice((None, rnd.randrange(50, 400) * 1000))
+        if salary_min and salary_max and salary_min > salary_max:
+            salary_min, salary_max = salary_max, salary_min
+        rows.append(
+            {
+                "title": fake.job(),
+                "description": fake.paragraph(nb_sentences=4),
+                "company_id": rnd.choice(_context["company_ids"]),
+                "field_id": rnd.choice(_context["field_ids"]),
+                "is_active": rnd.random() < 0.8,
+                "salary_min": salary_min,
+                "salary_max": salary_max,
+                "city": fake.city_name(),
+                "address": fake.street_address(),
+                "employment_type": rnd.choice(_context["employment_types"]),
+                "experience": rnd.choice(_context["experience"]),
+                "schedule": rnd.choice(_context["schedules"]),
+                "requirements": fake.paragraph(nb_sentences=3),
+                "responsibilities": fake.paragraph(nb_sentences=3),
+                "conditions": fake.paragraph(nb_sentences=2),
+            }
+        )
+    return rows
+
+
+def applications(chunk, start, count, seed):
+    fake, rnd = _random(seed, "applications", chunk)
+    user_ids = _context["user_ids"]
+    vacancy_ids = _context["vacancy_ids"]
+    rows = []
+    for number in range(start, start + count):
+        # Пара (пользователь, вакансия) выводится из номера отклика, так что
+        # пары не повторяются, пока number < len(user_ids) * len(vacancy_ids).
+        user_index = number % len(user_ids)
+        vacancy_index = (number // len(user_ids) + user_index * 7919) % len(vacancy_ids)
+        rows.append(
+            {
+                "user_id": user_ids[user_index],
+                "vacancy_id": vacancy_ids[vacancy_index],
+                "resume_file_url": fake.url() if rnd.random() < 0.5 else "",
+                "status": rnd.choice(_context["application_statuses"]),
+                "notes": fake.sentence() if rnd.random() < 0.3 else "",
+            }
+        )
+    return rows
+
+
+GENERATORS = {
+    "companies": companies,
+    "users": users,
+    "vacancies": vacancies,
+    "applications": applications,
+}
+
+
+def generate(task):
+    kind, chunk, start, count, seed = task
+    return GENERATORS[kind](chunk, start, count, seed)
+
+
+def chunks(kind, total, size, seed):
+    for chunk, start in enumerate(range(0, total, size)):
+        yield kind, chunk, start, min(size, total - start), seed
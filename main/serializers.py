@@ -1,23 +1,117 @@
+from django.urls import reverse
 from rest_framework import serializers
 
-from . import models
-from .models import Company, FieldOfStudy, Vacancy
+from . import bulk, images, lookups, profiling
+from .models import Company, ExportJob, FieldOfStudy, Vacancy
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class ProfiledListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with profiling.span("serializer"):
+            return super().data
+
+
+class ProfiledSerializerMixin:
+    """Время сериализации попадает в Server-Timing (см. main.profiling)."""
+
+    @property
+    def data(self):
+        with profiling.span("serializer"):
+            return super().data
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Уменьшенные копии изображения (main.images) по JSONField вариантов:
+    ``{"sm": {"webp": URL, "png": URL}, …}``; пока их нет — ``{}``.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return images.variant_urls(value, self.context.get("request"))
+
+
+class CompanySerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    logo_variants = ImageVariantsField()
+
     class Meta:
         model = Company
+        list_serializer_class = ProfiledListSerializer
         fields = "__all__"
 
 
-class VacancySerializer(serializers.ModelSerializer):
+class CompanyBriefSerializer(serializers.ModelSerializer):
+    """Компания в списке вакансий без ``?expand=company``."""
+
+    logo_variants = ImageVariantsField()
+
+    class Meta:
+        model = Company
+        fields = ["id", "name", "logo", "logo_variants"]
+
+
+class SparseSerializerMixin:
+    """
+    Поля по ``context["fields"]`` (None — все) и ``context["expand"]``:
+    вложенные объекты, которых нет в ``expand``, заменяются краткой формой
+    из ``brief_serializers``. Без этих ключей в контексте сериализатор
+    отдаёт всё (запись, массовые операции). См. main.fieldsets.
+    """
+
+    brief_serializers = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get("fields")
+        if requested is not None:
+            for name in [
+                name
+                for name, field in fields.items()
+                if name not in requested and not field.write_only
+            ]:
+                del fields[name]
+        expand = self.context.get("expand")
+        if expand is not None:
+            for name, serializer_class in self.brief_serializers.items():
+                if name in fields and name not in expand:
+                    fields[name] = serializer_class(read_only=True)
+        return fields
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PK-поле, которое сначала ищет объект в ``context["related_objects"]``
+    (``{модель: {str(pk): объект}}``). При массовой загрузке связанные объекты
+    читаются одним запросом на модель, а не одним запросом на элемент.
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context.get("related_objects", {}).get(
+            self.get_queryset().model
+        )
+        if objects is not None and str(data) in objects:
+            return objects[str(data)]
+        return super().to_internal_value(data)
+
+
+class VacancySerializer(
+    ProfiledSerializerMixin, SparseSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    brief_serializers = {"company": CompanyBriefSerializer}
+
     company = CompanySerializer(read_only=True)
-    company_id = serializers.PrimaryKeyRelatedField(
+    company_id = PrefetchedPrimaryKeyRelatedField(
         queryset=Company.objects.all(), write_only=True, source="company"
     )
 
     class Meta:
         model = Vacancy
+        list_serializer_class = ProfiledListSerializer
         fields = "__all__"
 
     def validate(self, data):
@@ -41,34 +135,28 @@ class VacancySerializer(serializers.ModelSerializer):
             pass
 
         employment_type = data.get("employment_type")
-        if employment_type:
-            valid_types = [choice[0] for choice in models.EMPLOYMENT_TYPE_CHOICES]
-            if employment_type not in valid_types:
-                raise serializers.ValidationError(
-                    {
-                        "employment_type": f"Недопустимое значение. Допустимые: {', '.join(valid_types)}"
-                    }
-                )
+        if employment_type and employment_type not in lookups.EMPLOYMENT_TYPES:
+            raise serializers.ValidationError(
+                {
+                    "employment_type": f"Недопустимое значение. Допустимые: {', '.join(lookups.EMPLOYMENT_TYPES.values)}"
+                }
+            )
 
         experience = data.get("experience")
-        if experience:
-            valid_experiences = [choice[0] for choice in models.EXPERIENCE_CHOICES]
-            if experience not in valid_experiences:
-                raise serializers.ValidationError(
-                    {
-                        "schedule": f"Недопустимое значение. Допустимые: {', '.join(valid_experiences)}"
-                    }
-                )
+        if experience and experience not in lookups.EXPERIENCE:
+            raise serializers.ValidationError(
+                {
+                    "schedule": f"Недопустимое значение. Допустимые: {', '.join(lookups.EXPERIENCE.values)}"
+                }
+            )
 
         schedule = data.get("schedule")
-        if schedule:
-            valid_schedules = [choice[0] for choice in models.SCHEDULE_CHOICES]
-            if schedule not in valid_schedules:
-                raise serializers.ValidationError(
-                    {
-                        "schedule": f"Недопустимое значение. Допустимые: {', '.join(valid_schedules)}"
-                    }
-                )
+        if schedule and schedule not in lookups.SCHEDULES:
+            raise serializers.ValidationError(
+                {
+                    "schedule": f"Недопустимое значение. Допустимые: {', '.join(lookups.SCHEDULES.values)}"
+                }
+            )
 
         return data
 
@@ -106,7 +194,58 @@ class VacancySerializer(serializers.ModelSerializer):
         return value
 
 
-class FieldOfStudySerializer(serializers.ModelSerializer):
+class VacancyIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=bulk.MAX_ITEMS,
+    )
+
+
+class FieldOfStudySerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = FieldOfStudy
+        list_serializer_class = ProfiledListSerializer
         fields = "__all__"
+
+
+class ExportJobSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    company_id = serializers.PrimaryKeyRelatedField(
+        queryset=Company.objects.all(),
+        source="company",
+        required=False,
+        allow_null=True,
+    )
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        list_serializer_class = ProfiledListSerializer
+        fields = [
+            "id",
+            "status",
+            "export_format",
+            "company_id",
+            "only_active",
+            "row_count",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "download_url",
+        ]
+        read_only_fields = [
+            "status",
+            "row_count",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+    def get_download_url(self, job):
+        if job.status != "done":
+            return None
+        url = reverse("exportjob-download", args=[job.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
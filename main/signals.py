@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from simple_history.signals import post_create_historical_record
+
+from . import caching, images, lookups, metrics, search
+from .models import Company, Event, FieldOfStudy, Vacancy
+
+
+def _bump(*namespaces):
+    def bump():
+        for namespace in namespaces:
+            caching.bump_version(namespace)
+
+    transaction.on_commit(bump)
+
+
+def vacancies_changed(ids):
+    ids = list(ids)
+    transaction.on_commit(lambda: search.get_backend().index_vacancies(ids))
+    _bump(
+        caching.VACANCIES,
+        *(caching.object_namespace(caching.VACANCY, pk) for pk in ids),
+    )
+
+
+def vacancies_deleted(ids):
+    ids = list(ids)
+    transaction.on_commit(lambda: search.get_backend().remove_vacancies(ids))
+    _bump(
+        caching.VACANCIES,
+        *(caching.object_namespace(caching.VACANCY, pk) for pk in ids),
+    )
+
+
+@receiver(post_save, sender=Vacancy)
+def vacancy_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    vacancies_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Vacancy)
+def vacancy_deleted(sender, instance, **kwargs):
+    vacancies_deleted([instance.pk])
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    _bump(caching.COMPANIES, caching.object_namespace(caching.COMPANY, instance.pk))
+    if not created:
+        vacancies_changed(instance.vacancies.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted(sender, instance, **kwargs):
+    _bump(caching.COMPANIES, caching.object_namespace(caching.COMPANY, instance.pk))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Event)
+def image_fields_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    images.schedule(instance)
+
+
+@receiver(images.images_changed, sender=Company)
+def company_images_changed(sender, pks, **kwargs):
+    # Логотип есть на страницах компаний и вакансий и в ответах API.
+    vacancy_ids = Vacancy.objects.filter(company_id__in=pks).values_list(
+        "id", flat=True
+    )
+    _bump(
+        caching.COMPANIES,
+        caching.VACANCIES,
+        *(caching.object_namespace(caching.COMPANY, pk) for pk in pks),
+        *(caching.object_namespace(caching.VACANCY, pk) for pk in vacancy_ids),
+    )
+
+
+@receiver(post_save, sender=FieldOfStudy)
+@receiver(post_delete, sender=FieldOfStudy)
+def field_of_study_changed(sender, **kwargs):
+    transaction.on_commit(lookups.fields_of_study.invalidate)
+    _bump(caching.VACANCIES)
+
+
+@receiver(post_create_historical_record)
+def historical_record_created(sender, instance, **kwargs):
+    metrics.history_written(type(instance))
@@ -0,0 +1,74 @@
+import re
+
+# Стеммер Портера (Snowball) для русского языка. SQLite FTS5 умеет только
+# английский porter, поэтому основы слов считаем на стороне приложения
+# и кладём в индекс уже нормализованный текст.
+
+_PERFECTIVE_GERUND = re.compile(
+    r"((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$"
+)
+_REFLEXIVE = re.compile(r"(с[яь])$")
+_ADJECTIVE = re.compile(
+    r"(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|ую|юю"
+    r"|ая|яя|ою|ею)$"
+)
+_PARTICIPLE = re.compile(r"((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$")
+_VERB = re.compile(
+    r"((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|ят|ует"
+    r"|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но"
+    r"|ет|ют|ны|ть|ешь|нно)))$"
+)
+_NOUN = re.compile(
+    r"(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|ом|о|у"
+    r"|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$"
+)
+_RV = re.compile(r"^(.*?[аеиоуыэюя])(.*)$")
+_DERIVATIONAL = re.compile(r".*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$")
+_DER = re.compile(r"ость?$")
+_SUPERLATIVE = re.compile(r"(ейше|ейш)$")
+_I = re.compile(r"и$")
+_SOFT_SIGN = re.compile(r"ь$")
+_NN = re.compile(r"нн$")
+
+_CYRILLIC = re.compile(r"[а-я]")
+_TOKEN = re.compile(r"\w+")
+
+
+def stem(word):
+    word = word.lower().replace("ё", "е")
+    match = _RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+
+    temp = _PERFECTIVE_GERUND.sub("", rv, 1)
+    if temp == rv:
+        rv = _REFLEXIVE.sub("", rv, 1)
+        temp = _ADJECTIVE.sub("", rv, 1)
+        if temp != rv:
+            rv = _PARTICIPLE.sub("", temp, 1)
+        else:
+            temp = _VERB.sub("", rv, 1)
+            rv = _NOUN.sub("", rv, 1) if temp == rv else temp
+    else:
+        rv = temp
+
+    rv = _I.sub("", rv, 1)
+    if _DERIVATIONAL.match(rv):
+        rv = _DER.sub("", rv, 1)
+
+    temp = _SOFT_SIGN.sub("", rv, 1)
+    if temp == rv:
+        rv = _SUPERLATIVE.sub("", rv, 1)
+        rv = _NN.sub("н", rv, 1)
+    else:
+        rv = temp
+    return start + rv
+
+
+def tokenize(text):
+    """Разбивает текст на слова и приводит русские слова к основе."""
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower().replace("ё", "е")):
+        tokens.append(stem(token) if _CYRILLIC.search(token) else token)
+    return tokens
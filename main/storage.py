@@ -0,0 +1,47 @@
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_LENGTH = 16
+
+
+def file_digest(content):
+    """SHA-256 содержимого файла; позиция чтения возвращается в начало."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """``logos/газпром.PNG`` → ``logos/<хэш>.png``."""
+    directory, filename = posixpath.split(name)
+    extension = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:HASH_LENGTH] + extension)
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """
+    Хранилище загружаемых изображений: имя файла — начало SHA-256
+    содержимого. Повторная загрузка того же файла не создаёт копию вроде
+    ``газпром_kvayFmx.png``, а возвращает уже сохранённое имя; а раз
+    содержимое по имени не меняется, его URL можно кэшировать навсегда.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = hashed_name(name, file_digest(content))
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+image_storage = ContentHashStorage()
@@ -0,0 +1,85 @@
+from collections.abc import Mapping
+
+from django import template
+from django.conf import settings
+from django.template.defaultfilters import floatformat
+
+from main import images
+
+register = template.Library()
+
+# Краткие подписи карточки (в choices модели — полные).
+EMPLOYMENT_BADGES = {
+    "full": ("bg-success", "Полная"),
+    "internship": ("bg-info", "Стажировка"),
+    "part": ("bg-warning", "Частичная"),
+}
+EMPLOYMENT_BADGE_DEFAULT = ("bg-secondary", "Проект")
+SCHEDULE_SHORT = {"remote": "Удалёнка", "office": "Офис", "hybrid": "Гибрид"}
+SCHEDULE_SHORT_DEFAULT = "По договорённости"
+
+
+@register.filter
+def employment_badge(value):
+    """CSS-класс бейджа типа занятости."""
+    return EMPLOYMENT_BADGES.get(value, EMPLOYMENT_BADGE_DEFAULT)[0]
+
+
+@register.filter
+def employment_short(value):
+    return EMPLOYMENT_BADGES.get(value, EMPLOYMENT_BADGE_DEFAULT)[1]
+
+
+@register.filter
+def schedule_short(value):
+    return SCHEDULE_SHORT.get(value, SCHEDULE_SHORT_DEFAULT)
+
+
+@register.filter
+def salary_range(vacancy):
+    """«от … до … ₽» по salary_min/salary_max вакансии."""
+    salary_min, salary_max = (
+        _field(vacancy, "salary_min"),
+        _field(vacancy, "salary_max"),
+    )
+    if salary_min and salary_max:
+        return f"от {floatformat(salary_min, 0)} до {floatformat(salary_max, 0)} ₽"
+    if salary_min:
+        return f"от {floatformat(salary_min, 0)} ₽"
+    if salary_max:
+        return f"до {floatformat(salary_max, 0)} ₽"
+    return "По договорённости"
+
+
+@register.filter
+def logo_url(company, variant=None):
+    """
+    URL логотипа компании или заглушки; ``company|logo_url:"sm"`` — PNG
+    уменьшенной копии, если она уже готова.
+    """
+    logo = _field(company, "logo") if company is not None else None
+    if not logo:
+        return f"{settings.MEDIA_URL}logos/not_found.png"
+    if variant is not None:
+        url = images.variant_url(logo, _field(company, "logo_variants"), variant, "png")
+        if url is not None:
+            return url
+    return logo.url
+
+
+@register.filter
+def logo_webp(company, variant):
+    """URL WebP-копии логотипа или пустая строка, пока её нет."""
+    if company is None:
+        return ""
+    return (
+        images.variant_url(
+            _field(company, "logo"), _field(company, "logo_variants"), variant, "webp"
+        )
+        or ""
+    )
+
+
+def _field(obj, name):
+    # Объект модели или ModelRow из представлений.
+    return obj[name] if isinstance(obj, Mapping) else getattr(obj, name)
@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import TestCase, override_settings
+
+from . import facets, lookups
+from .models import Company, FieldOfStudy, Vacancy
+from .querybudget import AUTH_QUERIES, BUDGETS, UNCACHED
+
+
+@override_settings(**UNCACHED)
+class QueryBudgetTests(TestCase):
+    """
+    Число SQL-запросов основных страниц и API (main.querybudget.BUDGETS).
+    Данных несколько строк каждого вида, так что N+1 сразу меняет счёт.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        fields = FieldOfStudy.objects.bulk_create(
+            FieldOfStudy(name=name) for name in ("Информатика", "Экономика")
+        )
+        for index in range(3):
+            company = Company.objects.create(
+                name=f"Компания {index}", industry="IT", description="Описание"
+            )
+            for number in range(3):
+                Vacancy.objects.create(
+                    title=f"Разработчик {index}-{number}",
+                    description="Краткое описание",
+                    company=company,
+                    field=fields[number % len(fields)],
+                    salary_min=50000 * (number + 1),
+                    city="Москва",
+                    employment_type=("full", "part", "internship")[number],
+                    experience="no",
+                    schedule=("office", "remote", "hybrid")[number],
+                    is_active=number != 2,
+                )
+        cls.vacancy = Vacancy.objects.order_by("id").first()
+        cls.company = cls.vacancy.company
+        cls.admin = get_user_model().objects.create_superuser(
+            email="admin@example.ru", password="admin", full_name="Админ"
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_budgets(self):
+        for name, url, limit in BUDGETS:
+            url = url.format(vacancy=self.vacancy.id, company=self.company.id)
+            with self.subTest(name, url=url):
+                # Каждая страница — с холодными кэшами процесса.
+                cache.clear()
+                lookups.fields_of_study.invalidate()
+                with self.assertNumQueries(limit + AUTH_QUERIES):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name="Компания")
+        for employment_type, city in (
+            ("full", "Москва"),
+            ("full", "Казань"),
+            ("part", "Москва"),
+        ):
+            Vacancy.objects.create(
+                title="Вакансия",
+                description="Описание",
+                company=company,
+                city=city,
+                employment_type=employment_type,
+                experience="no",
+                schedule="office",
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_selected_facet_keeps_sibling_counts(self):
+        queryset, facet_querysets = facets.disjunctive(
+            Vacancy.objects.all(), {"employment_type": Q(employment_type="full")}
+        )
+        result = facets.compute(queryset, facet_querysets)
+        counts = {item["value"]: item["count"] for item in result["employment_type"]}
+        self.assertEqual(result["total"], 2)
+        self.assertEqual((counts["full"], counts["part"]), (2, 1))
+        # Остальные фасеты считаются с выбранным фильтром.
+        cities = {item["value"]: item["count"] for item in result["city"]}
+        self.assertEqual(cities, {"Москва": 1, "Казань": 1})
+
+    def test_api_city_facet_ignores_its_own_filter(self):
+        data = self.client.get("/api/vacancies/", {"city": "Казань"}).json()
+        cities = {item["value"]: item["count"] for item in data["facets"]["city"]}
+        self.assertEqual(data["facets"]["total"], 1)
+        self.assertEqual(cities, {"Москва": 2, "Казань": 1})
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name="Компания")
+        cls.vacancies = [
+            Vacancy.objects.create(
+                title=f"Вакансия {index}",
+                description="Описание",
+                company=company,
+                city="Москва",
+                employment_type="full",
+                experience="no",
+                schedule="office",
+            )
+            for index in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_revalidates_by_etag_only(self):
+        response = self.client.get("/api/vacancies/")
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get("/api/vacancies/", HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        # Удаление не двигает MAX(updated_at), но меняет ETag.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vacancies[0].delete()
+        response = self.client.get("/api/vacancies/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_keeps_last_modified(self):
+        url = f"/api/vacancies/{self.vacancies[1].id}/"
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
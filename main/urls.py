@@ -1,21 +1,36 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from . import api, views
+from . import api, images, metrics, views
 
 router = DefaultRouter()
 router.register(r"companies", api.CompanyViewSet)
 router.register(r"vacancies", api.VacancyViewSet)
+router.register(r"export-jobs", api.ExportJobViewSet)
+
+# Под ASGI (ASYNC_VIEWS) страницы чтения вакансий обслуживаются async-версиями.
+if settings.ASYNC_VIEWS:
+    vacancy_list, vacancy_detail = views.get_vacancies_async, views.get_vacancy_async
+else:
+    vacancy_list, vacancy_detail = views.get_vacancies, views.get_vacancy
 
 urlpatterns = [
     path("api/", include(router.urls)),
+    path("metrics", metrics.metrics_view, name="metrics"),
     path("", views.main, name="main"),
-    path("vacancies", views.get_vacancies, name="vacancies"),
-    path("vacancies/<int:id>", views.get_vacancy, name="get_vacancy"),
+    path("vacancies", vacancy_list, name="vacancies"),
+    path("vacancies/<int:id>", vacancy_detail, name="get_vacancy"),
     path("vacancies/<str:id>/edit/", views.edit_vacancy, name="edit_vacancy"),
     path('<int:id>/delete/', views.delete_vacancy, name='delete_vacancy'),
     path("companies", views.get_companies, name="companies"),
     path("companies/<str:id>/edit/", views.edit_company, name="edit_company"),
+    # Не только в DEBUG: в отличие от остального MEDIA_URL, с вечным кэшем.
+    path(
+        f"{settings.MEDIA_URL.strip('/')}/{images.VARIANTS_DIR}/<path:path>",
+        views.image_variant,
+        name="image_variant",
+    ),
     path(
         "export/vacancies/company/<int:company_id>/",
         views.export_vacancies_xlsx,
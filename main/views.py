@@ -1,71 +1,161 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
-from django.forms.models import model_to_dict
-from django.http import HttpResponse, HttpResponseBadRequest
-from django.shortcuts import get_object_or_404, redirect, render
+import posixpath
 
-from . import forms, models
-from .resources import VacancyResource
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from . import (
+    caching,
+    exports,
+    facets,
+    forms,
+    fragments,
+    images,
+    lookups,
+    models,
+    search,
+)
+from .pagination import InvalidCursor, KeysetPaginator
+from .rows import ModelRow
+
+VACANCIES_PER_PAGE = 30
+VACANCY_FILTER_PARAMS = ("position", "specialization", "employment_type", "experience")
 
 
 def main(request):
     return redirect("vacancies")
 
 
-def get_vacancies(request):
+def _filter_vacancies(request, field):
+    """
+    Фильтры страницы вакансий. ``field`` — направление, найденное по
+    ``?specialization=``: поиск в справочнике делает вызывающий код, потому
+    что в async-представлении он асинхронный. Возвращает (queryset без
+    фильтров-фасетов, фильтры-фасеты для facets.disjunctive(), ошибка).
+    """
     vacancies = models.Vacancy.objects.filter(is_active=True).select_related("company")
+    filters = {}
 
     query_position = request.GET.get("position")
-    if query_position:
-        vacancies = vacancies.filter(title__icontains=query_position)
+    if query_position and query_position.strip():
+        vacancies = search.search_vacancies(vacancies, query_position, order=False)
 
-    query_specialization = request.GET.get("specialization")
-    if query_specialization and query_specialization != "-1":
-        try:
-            field = models.FieldOfStudy.objects.get(id=query_specialization)
-            vacancies = vacancies.filter(field=field)
-        except ObjectDoesNotExist:
-            return HttpResponseBadRequest("Invalid specialization")
+    if _specialization(request) is not None:
+        if field is None:
+            return None, None, HttpResponseBadRequest("Invalid specialization")
+        filters["field"] = Q(field_id=field.id)
 
     query_employment_type = request.GET.get("employment_type")
     if query_employment_type and query_employment_type != "-1":
-        valid_values = {choice[0] for choice in models.EMPLOYMENT_TYPE_CHOICES}
-        if query_employment_type not in valid_values:
-            return HttpResponseBadRequest("Invalid employment type")
+        if query_employment_type not in lookups.EMPLOYMENT_TYPES:
+            return None, None, HttpResponseBadRequest("Invalid employment type")
         else:
-            vacancies = vacancies.filter(employment_type=query_employment_type)
+            filters["employment_type"] = Q(employment_type=query_employment_type)
 
     query_experience = request.GET.get("experience")
     if query_experience and query_experience != "-1":
-        valid_values = {choice[0] for choice in models.EXPERIENCE_CHOICES}
-        if query_experience not in valid_values:
-            return HttpResponseBadRequest("Invalid experience choice")
+        if query_experience not in lookups.EXPERIENCE:
+            return None, None, HttpResponseBadRequest("Invalid experience choice")
         else:
-            vacancies = vacancies.filter(experience=query_experience)
+            filters["experience"] = Q(experience=query_experience)
+
+    return vacancies, filters, None
+
+
+def _specialization(request):
+    value = request.GET.get("specialization")
+    return value if value and value != "-1" else None
+
+
+def _filter_params(request):
+    return {key: request.GET.getlist(key) for key in VACANCY_FILTER_PARAMS}
 
-    data = []
-    for v in vacancies:
-        vacancy_dict = model_to_dict(v)
-        vacancy_dict["company"] = model_to_dict(v.company)
-        data.append(vacancy_dict)
 
-    fields = models.FieldOfStudy.objects.all()
+def _paginator(request, vacancies):
+    ordering = ("-created_at", "-id")
+    query_position = request.GET.get("position")
+    if query_position and query_position.strip():
+        vacancies = search.search_vacancies(vacancies, query_position)
+        ordering = (f"-{search.SearchBackend.rank_alias}", "-created_at", "-id")
+    return KeysetPaginator(vacancies, ordering=ordering, per_page=VACANCIES_PER_PAGE)
+
+
+def _vacancy_rows(page):
+    return [ModelRow(v) for v in page]
+
 
+def _render_vacancies(request, page, vacancy_facets, cards):
     context = {
-        "vacancies": data,
-        "fields": fields,
-        "employment_type_choices": models.EMPLOYMENT_TYPE_CHOICES,
-        "experience_choices": models.EXPERIENCE_CHOICES,
+        "cards": cards,
+        "page": page,
+        "facets": vacancy_facets,
     }
-
     return render(request, "vacancies.html", context)
 
 
+@caching.cache_response(caching.VACANCIES)
+def get_vacancies(request):
+    specialization = _specialization(request)
+    field = lookups.fields_of_study.get(specialization) if specialization else None
+    vacancies, filters, error = _filter_vacancies(request, field)
+    if error is not None:
+        return error
+
+    vacancies, facet_querysets = facets.disjunctive(vacancies, filters)
+    vacancy_facets = facets.get_facets(
+        vacancies, _filter_params(request), "html", facet_querysets
+    )
+    try:
+        page = _paginator(request, vacancies).page(request.GET.get("cursor"))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    cards = fragments.VACANCY_CARD.render(_vacancy_rows(page))
+    return _render_vacancies(request, page, vacancy_facets, cards)
+
+
+@caching.cache_response(caching.VACANCIES)
+async def get_vacancies_async(request):
+    """get_vacancies для ASGI: кэш и ORM без блокирующих вызовов."""
+    specialization = _specialization(request)
+    field = (
+        await lookups.fields_of_study.aget(specialization) if specialization else None
+    )
+    vacancies, filters, error = _filter_vacancies(request, field)
+    if error is not None:
+        return error
+
+    vacancies, facet_querysets = facets.disjunctive(vacancies, filters)
+    vacancy_facets = await facets.aget_facets(
+        vacancies, _filter_params(request), "html", facet_querysets
+    )
+    try:
+        page = await _paginator(request, vacancies).apage(request.GET.get("cursor"))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    cards = await fragments.VACANCY_CARD.arender(_vacancy_rows(page))
+    return _render_vacancies(request, page, vacancy_facets, cards)
+
+
+def _render_vacancy(request, v):
+    response = render(request, "vacancy.html", {"v": ModelRow(v)})
+    return caching.set_last_modified(response, max(v.updated_at, v.company.updated_at))
+
+
+@caching.cache_response(caching.VACANCY, object_kwarg="id")
 def get_vacancy(request, id):
-    v = models.Vacancy.objects.filter(id=id).select_related("company").first()
-    vacancy_dict = model_to_dict(v)
-    vacancy_dict["company"] = model_to_dict(v.company)
-    return render(request, "vacancy.html", {"v": vacancy_dict})
+    v = get_object_or_404(models.Vacancy.objects.select_related("company"), id=id)
+    return _render_vacancy(request, v)
+
+
+@caching.cache_response(caching.VACANCY, object_kwarg="id")
+async def get_vacancy_async(request, id):
+    v = await aget_object_or_404(
+        models.Vacancy.objects.select_related("company"), id=id
+    )
+    return _render_vacancy(request, v)
 
 
 def edit_vacancy(request, id):
@@ -100,9 +190,10 @@ def edit_vacancy(request, id):
             return render(request, "edit_vacancy.html", {"form": form, "v": v})
 
 
+@caching.cache_response(caching.COMPANIES)
 def get_companies(request):
-    companies = models.Company.objects.all()
-    return render(request, "companies.html", {"companies": companies})
+    tiles = fragments.COMPANY_TILE.render(list(models.Company.objects.all()))
+    return render(request, "companies.html", {"tiles": tiles})
 
 
 def edit_company(request, id):
@@ -124,21 +215,40 @@ def edit_company(request, id):
 
 
 def export_vacancies_xlsx(request, company_id):
-    vacancies = models.Vacancy.objects.filter(
-        Q(company_id=company_id) & Q(is_active=True)
+    export_format = request.GET.get("format", "xlsx")
+    if export_format not in exports.EXPORT_FORMATS:
+        return HttpResponseBadRequest("Invalid export format")
+    content_type, extension = exports.EXPORT_FORMATS[export_format]
+
+    rows = exports.iter_rows(exports.company_vacancies(company_id))
+    response = StreamingHttpResponse(
+        exports.iter_export(rows, export_format), content_type=content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="vacancies_{company_id}.{extension}"'
     )
+    return response
 
-    dataset = VacancyResource().export(queryset=vacancies)
-    response = HttpResponse(
-        dataset.xlsx,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+def image_variant(request, path):
+    """
+    Уменьшенная копия изображения (main.images). В имени хэш исходника,
+    поэтому ответ можно кэшировать навсегда (immutable).
+    """
+    response = serve(
+        request,
+        posixpath.join(images.VARIANTS_DIR, path),
+        document_root=settings.MEDIA_ROOT,
     )
-    response["Content-Disposition"] = (
-        f'attachment; filename="vacancies_{company_id}.xlsx"'
+    patch_cache_control(
+        response, public=True, max_age=images.VARIANT_MAX_AGE, immutable=True
     )
     return response
 
+
 def delete_vacancy(request, id):
     vacancy = get_object_or_404(models.Vacancy, id=id)
+    if request.method != "POST":
+        return render(request, "delete_vacancy.html", {"v": vacancy})
     vacancy.delete()
-    return redirect('vacancies')  
\ No newline at end of file
+    return redirect("vacancies")
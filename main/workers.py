@@ -0,0 +1,17 @@
+import os
+
+# Точки входа для процессов пула run_export_worker. Пул стартует через spawn,
+# поэтому модуль не должен импортировать модели до django.setup().
+
+
+def init_process():
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "careercenter.settings")
+    django.setup()
+
+
+def run_export_job(job_id):
+    from .jobs import run_job
+
+    return run_job(job_id)